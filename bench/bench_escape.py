@@ -0,0 +1,132 @@
+"""Measure what escaping costs a page on ordinary text.
+
+    python3 bench/bench_escape.py [--size MB] [--repeat N]
+
+Inline text and attribute values are escaped once, when
+text_node_to_html_node builds their leaves, into EscapedLeafNodes that
+the serializer writes without further checks. The verbatim path takes
+all of that out, building plain LeafNodes from unescaped values and
+serializing with the escaping calls removed, as the code was before; the
+escaping path is the code as it is. Both parse with the inline memo
+emptied first, so every leaf is built (and escaped) again. The sample
+prose has no special characters, as most prose does; the cost is shown
+against the serializer alone and against parsing plus serializing, which
+is what a page costs. A second run on text full of `<` and `&` shows the
+slow path for comparison.
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import textnode  # noqa: E402
+from htmlnode import HTMLNode, LeafNode  # noqa: E402
+from textnode import markdown_to_html_node  # noqa: E402
+
+sample = """## Section heading
+
+A paragraph with **bold**, *italic* and `code`, plus a [link](/docs/page)
+that runs on for a while to look like ordinary prose in a long document.
+
+* first item with *emphasis*
+* second item with a [link](/next)
+
+> A quote that spans
+> two lines.
+
+"""
+
+special = """A paragraph where a < b && c > d, with a [link](/search?q=a&b=c)
+and `x < y` in code.
+
+"""
+
+
+def verbatim_props_to_html(self):
+    if self.props is None:
+        return ""
+    return "".join([f' {prop}="{value}"' for prop, value in self.props.items()])
+
+
+def verbatim_leaf_to_html(self):
+    if self.value is None:
+        raise ValueError("Invalid HTML: no value")
+    if self.tag is None:
+        return self.value
+    if self.props is None:
+        return f"<{self.tag}>{self.value}</{self.tag}>"
+    return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+
+
+def unchanged(value):
+    return value
+
+
+def verbatim_to_html(node):
+    """ serialize with the escaping calls taken out of the current methods """
+    escaping = HTMLNode.props_to_html, LeafNode.to_html
+    HTMLNode.props_to_html, LeafNode.to_html = verbatim_props_to_html, verbatim_leaf_to_html
+    try:
+        return node.to_html()
+    finally:
+        HTMLNode.props_to_html, LeafNode.to_html = escaping
+
+
+def parse(markdown):
+    textnode._memoized_inline_nodes.cache_clear()
+    return markdown_to_html_node(markdown)
+
+
+def verbatim_parse(markdown):
+    """ parse into plain LeafNodes holding unescaped values """
+    escaping = textnode.EscapedLeafNode, textnode.escape_text, textnode.escape_attribute
+    textnode.EscapedLeafNode = LeafNode
+    textnode.escape_text = textnode.escape_attribute = unchanged
+    try:
+        return parse(markdown)
+    finally:
+        textnode.EscapedLeafNode, textnode.escape_text, textnode.escape_attribute = escaping
+
+
+def best_of(funcs, repeat):
+    """ fastest of `repeat` runs of each (function, argument) pair, taking turns so drift hits them alike """
+    best = [None] * len(funcs)
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for number, (func, argument) in enumerate(funcs):
+                start = time.perf_counter()
+                func(argument)
+                elapsed = time.perf_counter() - start
+                if best[number] is None or elapsed < best[number]:
+                    best[number] = elapsed
+    finally:
+        gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=float, default=2,
+                        help="markdown size in MB")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="runs per path; the fastest is reported")
+    args = parser.parse_args()
+
+    for label, text in (("plain", sample), ("special", special)):
+        markdown = "# Benchmark\n\n" + text * int(args.size * 1024 * 1024 / len(text))
+        verbatim_node, node = verbatim_parse(markdown), parse(markdown)
+        assert verbatim_to_html(verbatim_node) == verbatim_to_html(node) or label != "plain", "outputs differ"
+        verbatim_build, build, verbatim, escaping = best_of(
+            ((verbatim_parse, markdown), (parse, markdown),
+             (verbatim_to_html, verbatim_node), (HTMLNode.to_html, node)), args.repeat)
+        print(f"{label:>8}: serializer {verbatim * 1000:7.1f} -> {escaping * 1000:7.1f} ms "
+              f"{100 * (escaping - verbatim) / verbatim:+6.1f}%   parse + serialize "
+              f"{(verbatim_build + verbatim) * 1000:7.1f} -> {(build + escaping) * 1000:7.1f} ms "
+              f"{100 * (build + escaping - verbatim_build - verbatim) / (verbatim_build + verbatim):+6.1f}%")
+
+if __name__ == "__main__":
+    main()
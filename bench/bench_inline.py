@@ -0,0 +1,65 @@
+"""Compare the single-pass inline tokenizer with the old split_nodes_* chain.
+
+    python3 bench/bench_inline.py [--size KB ...]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from textnode import (  # noqa: E402
+    TextNode,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+    text_type_bold,
+    text_type_code,
+    text_type_italic,
+    text_type_text,
+)
+
+sentence = (
+    "Some **bold words** and an *italic aside* next to `inline_code()` with "
+    "a [link to docs](/docs/page) and an ![icon](/images/icon.png) here. "
+)
+
+
+def chained_text_to_textnodes(text):
+    nodes = [TextNode(text, text_type_text)]
+    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
+    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
+    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def paragraph(size_kb):
+    return (sentence * (size_kb * 1024 // len(sentence) + 1))[:size_kb * 1024]
+
+
+def best_of(func, text, repeat):
+    return min(timeit.repeat(lambda: func(text), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, nargs="+", default=[10, 50, 200],
+                        help="paragraph sizes in KB")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'chained':>12} {'single-pass':>12} {'speedup':>8}")
+    for size_kb in args.size:
+        text = paragraph(size_kb)
+        chained = best_of(chained_text_to_textnodes, text, args.repeat)
+        single = best_of(text_to_textnodes, text, args.repeat)
+        print(f"{size_kb:>6}KB {chained * 1000:>10.2f}ms {single * 1000:>10.2f}ms "
+              f"{chained / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
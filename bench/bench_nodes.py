@@ -0,0 +1,78 @@
+"""Measure how many nodes fit in a MB with the __slots__ node classes.
+
+    python3 bench/bench_nodes.py [--count N]
+
+The "dict" rows use plain classes with the same attributes as the
+pre-__slots__ TextNode, LeafNode and ParentNode, for comparison.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from htmlnode import LeafNode, ParentNode  # noqa: E402
+from textnode import TextNode, text_type_bold  # noqa: E402
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+text = "shared text"
+cases = (
+    ("TextNode", lambda: DictTextNode(text, text_type_bold),
+     lambda: TextNode(text, text_type_bold)),
+    ("LeafNode", lambda: DictLeafNode("b", text),
+     lambda: LeafNode("b", text)),
+    ("ParentNode", lambda: DictParentNode("p", None),
+     lambda: ParentNode("p", None)),
+)
+
+
+def nodes_per_mb(factory, count):
+    tracemalloc.start()
+    nodes = [factory() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    return count / (size / 1024 / 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'class':>12} {'dict':>12} {'slots':>12} {'gain':>6}")
+    for name, before, after in cases:
+        dict_rate = nodes_per_mb(before, args.count)
+        slots_rate = nodes_per_mb(after, args.count)
+        print(f"{name:>12} {dict_rate:>9.0f}/MB {slots_rate:>9.0f}/MB "
+              f"{slots_rate / dict_rate:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
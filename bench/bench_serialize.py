@@ -0,0 +1,109 @@
+"""Compare string concatenation with streaming serialization on a large page.
+
+    python3 bench/bench_serialize.py [--size MB]
+
+The legacy path rebuilds the old ParentNode.to_html (children_html += ...)
+followed by two template.replace calls; the streaming path writes the
+template prefix, the node tree and the suffix through output.stream_file,
+as generate_page does.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from htmlnode import ParentNode  # noqa: E402
+from output import stream_file  # noqa: E402
+from textnode import markdown_to_html_node  # noqa: E402
+
+template_path = os.path.join(
+    os.path.dirname(__file__), "..", "templates", "base.html")
+
+sample = """## Section heading
+
+A paragraph with **bold**, *italic* and `code`, plus a [link](/docs/page)
+that runs on for a while to look like ordinary prose in a long document.
+
+* first item with *emphasis*
+* second item with a [link](/next)
+
+> A quote that spans
+> two lines.
+
+```
+def example():
+    return 42
+```
+
+"""
+
+
+def concat_to_html(node):
+    if not isinstance(node, ParentNode):
+        return node.to_html()
+    children_html = ""
+    for child in node.children:
+        children_html += concat_to_html(child)
+    return f"<{node.tag}{node.props_to_html()}>{children_html}</{node.tag}>"
+
+
+def legacy_write(node, template, dest_path):
+    html = concat_to_html(node)
+    new_html = template.replace(
+        "{{ Title }}", "Benchmark").replace("{{ Content }}", html)
+    with open(dest_path, "w") as file:
+        file.write(new_html)
+
+
+def streaming_write(node, template, dest_path):
+    prefix, _, suffix = template.partition("{{ Content }}")
+
+    def fill(file):
+        file.write(prefix.replace("{{ Title }}", "Benchmark"))
+        node.write_html(file)
+        file.write(suffix.replace("{{ Title }}", "Benchmark"))
+
+    stream_file(dest_path, fill)
+
+
+def measure(func, node, template, dest_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(node, template, dest_path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=float, default=5,
+                        help="markdown size in MB")
+    args = parser.parse_args()
+
+    markdown = "# Benchmark\n\n" + sample * \
+        int(args.size * 1024 * 1024 / len(sample))
+    node = markdown_to_html_node(markdown)
+    with open(template_path) as file:
+        template = file.read()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, func in (("concat", legacy_write), ("streaming", streaming_write)):
+            dest_path = os.path.join(tmp, f"{name}.html")
+            results[name] = measure(func, node, template, dest_path)
+        with open(os.path.join(tmp, "concat.html")) as a, open(os.path.join(tmp, "streaming.html")) as b:
+            assert a.read() == b.read(), "outputs differ"
+
+    print(f"markdown: {len(markdown) / 1024 / 1024:.1f} MB")
+    for name, (elapsed, peak) in results.items():
+        print(f"{name:>10}: {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
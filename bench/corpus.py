@@ -0,0 +1,152 @@
+"""Generate a synthetic content/ tree for build benchmarks.
+
+    python3 bench/corpus.py OUT_DIR --pages 1000 --depth 3 --seed 1
+
+Pages mix every block type detect_block_type knows about, sprinkle inline
+markup at a configurable density, and can include very long paragraphs.
+The same arguments always produce the same tree.
+"""
+import argparse
+import os
+import random
+
+words = (
+    "static site generator markdown template render block inline node "
+    "parser output cache build page section archive index feed link image "
+    "quick brown fox jumps over the lazy dog lorem ipsum dolor sit amet"
+).split()
+
+default_block_mix = {
+    "paragraph": 6,
+    "heading": 2,
+    "unordered_list": 2,
+    "ordered_list": 1,
+    "quote": 1,
+    "code": 1,
+}
+
+
+def inline_text(rng, word_count, density):
+    parts = []
+    for _ in range(word_count):
+        word = rng.choice(words)
+        if rng.random() < density:
+            kind = rng.randrange(5)
+            if kind == 0:
+                word = f"**{word}**"
+            elif kind == 1:
+                word = f"*{word}*"
+            elif kind == 2:
+                word = f"`{word}`"
+            elif kind == 3:
+                word = f"[{word}](/{rng.choice(words)}/)"
+            else:
+                word = f"![{word}](/images/{rng.choice(words)}.png)"
+        parts.append(word)
+    return " ".join(parts)
+
+
+def block(rng, block_type, density, long_paragraph_kb):
+    if block_type == "heading":
+        return "#" * rng.randint(2, 4) + " " + inline_text(rng, rng.randint(2, 6), density)
+    if block_type == "unordered_list":
+        return "\n".join("* " + inline_text(rng, rng.randint(2, 10), density)
+                         for _ in range(rng.randint(2, 8)))
+    if block_type == "ordered_list":
+        return "\n".join(f"{i}. " + inline_text(rng, rng.randint(2, 10), density)
+                         for i in range(1, rng.randint(3, 9)))
+    if block_type == "quote":
+        return "\n".join("> " + inline_text(rng, rng.randint(5, 15), density)
+                         for _ in range(rng.randint(1, 4)))
+    if block_type == "code":
+        lines = [f"    {rng.choice(words)}_{i} = {rng.randint(0, 999)}"
+                 for i in range(rng.randint(3, 20))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if long_paragraph_kb:
+        return inline_text(rng, long_paragraph_kb * 1024 // 6, density)
+    return inline_text(rng, rng.randint(20, 120), density)
+
+
+def page(rng, index, blocks, block_mix, density, long_paragraph_rate, long_paragraph_kb):
+    types = list(block_mix)
+    weights = [block_mix[name] for name in types]
+    parts = [f"# Page {index}"]
+    for block_type in rng.choices(types, weights, k=blocks):
+        long_kb = long_paragraph_kb if block_type == "paragraph" and rng.random() < long_paragraph_rate else 0
+        parts.append(block(rng, block_type, density, long_kb))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(out_dir, pages=100, depth=2, fanout=4, blocks=20, density=0.1,
+                    long_paragraph_rate=0.0, long_paragraph_kb=16, block_mix=None, seed=1):
+    """ write `pages` markdown files into out_dir and return their paths """
+    rng = random.Random(seed)
+    block_mix = block_mix or default_block_mix
+    paths = []
+    for index in range(pages):
+        parts = []
+        for _ in range(rng.randint(0, depth)):
+            parts.append(f"section-{rng.randrange(fanout)}")
+        directory = os.path.join(out_dir, *parts)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"page-{index}.md")
+        with open(path, "w") as file:
+            file.write(page(rng, index, blocks, block_mix, density,
+                            long_paragraph_rate, long_paragraph_kb))
+        paths.append(path)
+    return paths
+
+
+def parse_block_mix(value):
+    mix = dict(default_block_mix)
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in mix:
+            raise argparse.ArgumentTypeError(f"unknown block type '{name}'")
+        mix[name] = float(weight)
+    return mix
+
+
+def add_corpus_arguments(parser):
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=2,
+                        help="maximum directory nesting")
+    parser.add_argument("--fanout", type=int, default=4,
+                        help="directories per level")
+    parser.add_argument("--blocks", type=int, default=20,
+                        help="blocks per page")
+    parser.add_argument("--density", type=float, default=0.1,
+                        help="fraction of words carrying inline markup")
+    parser.add_argument("--long-paragraph-rate", type=float, default=0.05,
+                        help="fraction of paragraphs that are very long")
+    parser.add_argument("--long-paragraph-kb", type=int, default=16)
+    parser.add_argument("--block-mix", type=parse_block_mix, default=None,
+                        help="weights such as paragraph=6,code=2")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def corpus_options(args):
+    return {
+        "pages": args.pages,
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "blocks": args.blocks,
+        "density": args.density,
+        "long_paragraph_rate": args.long_paragraph_rate,
+        "long_paragraph_kb": args.long_paragraph_kb,
+        "block_mix": args.block_mix,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir")
+    add_corpus_arguments(parser)
+    args = parser.parse_args()
+    paths = generate_corpus(args.out_dir, **corpus_options(args))
+    print(f"Wrote {len(paths)} pages to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Load-test a running preview server over keep-alive connections.
+
+    python3 server.py --dir public &
+    python3 bench/loadtest.py --port 8888 --concurrency 16 --duration 10 / /kafka/ /index.css
+
+Each worker thread holds one HTTP/1.1 connection and cycles through the
+paths; pass --revalidate to send If-None-Match with the ETag seen first.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+
+
+def worker(host, port, paths, deadline, revalidate, latencies, errors):
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    etags = {}
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        headers = {"Accept-Encoding": "gzip, br"}
+        if revalidate and path in etags:
+            headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(path)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status >= 400:
+            errors.append(path)
+        elif response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    connection.close()
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=["/"])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--revalidate", action="store_true")
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=worker, args=(args.host, args.port, args.paths, deadline,
+                                                     args.revalidate, latencies, errors))
+               for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print(f"no successful requests ({len(errors)} errors)")
+        return
+    latencies.sort()
+    print(f"requests:  {len(latencies)} in {elapsed:.1f}s ({len(errors)} errors)")
+    print(f"rps:       {len(latencies) / elapsed:.0f}")
+    print(f"p50:       {statistics.median(latencies) * 1000:.2f} ms")
+    print(f"p99:       {percentile(latencies, 0.99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
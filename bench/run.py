@@ -0,0 +1,164 @@
+"""Time each build stage on a synthetic corpus and emit JSON results.
+
+    python3 bench/run.py --pages 500 --output results.json
+    python3 bench/run.py --pages 500 --compare baseline.json
+
+Stages are timed separately over the whole corpus:
+
+    markdown_to_blocks  scan_blocks over every page
+    text_to_textnodes   the inline tokenizer over every non-code block's text
+    block_to_html_node  building the HTML node tree (includes inline parsing)
+    to_html             serializing the tree
+    template            filling the page template
+    write               writing the finished pages to disk
+
+With --compare, stages slower than the baseline by more than --threshold
+(and by at least --min-delta seconds, to ignore noise on tiny stages) are
+reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from corpus import add_corpus_arguments, corpus_options, generate_corpus  # noqa: E402
+from template import TemplateLoader  # noqa: E402
+from textnode import (  # noqa: E402
+    block_to_html_node,
+    block_type_code,
+    scan_blocks,
+    text_to_textnodes,
+)
+from htmlnode import ParentNode  # noqa: E402
+
+template_dir = os.path.join(os.path.dirname(__file__), "..", "templates")
+stage_names = ("markdown_to_blocks", "text_to_textnodes", "block_to_html_node",
+               "to_html", "template", "write")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stages(markdowns, out_dir):
+    timings = dict.fromkeys(stage_names, 0.0)
+    clock = time.perf_counter
+    template = TemplateLoader(template_dir).load("base.html")
+
+    for index, markdown in enumerate(markdowns):
+        start = clock()
+        blocks = list(scan_blocks(markdown))
+        timings["markdown_to_blocks"] += clock() - start
+
+        start = clock()
+        for block in blocks:
+            if block.block_type != block_type_code:
+                text_to_textnodes(" ".join(block.lines))
+        timings["text_to_textnodes"] += clock() - start
+
+        start = clock()
+        node = ParentNode("div", [block_to_html_node(block.lines, block.block_type, block.props)
+                                  for block in blocks])
+        timings["block_to_html_node"] += clock() - start
+
+        start = clock()
+        html = node.to_html()
+        timings["to_html"] += clock() - start
+
+        start = clock()
+        page = template.render({"Title": f"Page {index}", "Content": html})
+        timings["template"] += clock() - start
+
+        start = clock()
+        with open(os.path.join(out_dir, f"{index}.html"), "w") as file:
+            file.write(page)
+        timings["write"] += clock() - start
+    return timings
+
+
+def compare(results, baseline, threshold, min_delta):
+    regressions = []
+    print(f"{'stage':>20} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for name in stage_names:
+        old = baseline["stages"].get(name, {}).get("seconds")
+        new = results["stages"][name]["seconds"]
+        if not old:
+            continue
+        ratio = new / old
+        flag = " REGRESSION" if ratio > threshold and new - old > min_delta else ""
+        print(f"{name:>20} {old * 1000:>8.1f}ms {new * 1000:>8.1f}ms {ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_corpus_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="keep the fastest of N runs per stage")
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="slowdown ratio counted as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.01,
+                        help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args()
+
+    options = corpus_options(args)
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        out_dir = os.path.join(tmp, "public")
+        os.makedirs(out_dir)
+        paths = generate_corpus(content_dir, **options)
+        markdowns = []
+        for path in paths:
+            with open(path) as file:
+                markdowns.append(file.read())
+
+        best = None
+        for _ in range(args.repeat):
+            timings = run_stages(markdowns, out_dir)
+            best = timings if best is None else {
+                name: min(best[name], timings[name]) for name in stage_names}
+
+    total_bytes = sum(len(markdown) for markdown in markdowns)
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "corpus": {**options, "block_mix": options["block_mix"] or "default"},
+        "pages": len(markdowns),
+        "markdown_bytes": total_bytes,
+        "stages": {
+            name: {"seconds": best[name], "pages_per_second": len(markdowns) / best[name] if best[name] else None}
+            for name in stage_names
+        },
+        "total_seconds": sum(best.values()),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if compare(results, baseline, args.threshold, args.min_delta):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
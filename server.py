@@ -1,30 +1,185 @@
-import os
-import argparse
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-
-
-def run(
-    server_class=HTTPServer,
-    handler_class=SimpleHTTPRequestHandler,
-    port=8888,
-    directory=None,
-):
-    if directory:
-        os.chdir(directory)
-    server_address = ("", port)
-    httpd = server_class(server_address, handler_class)
-    print(
-        f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
-    httpd.serve_forever()
-
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="HTTP Server")
-    parser.add_argument(
-        "--dir", type=str, help="Directory to serve files from", default="."
-    )
-    parser.add_argument("--port", type=int,
-                        help="Port to serve HTTP on", default=8888)
-    args = parser.parse_args()
-
-    run(port=args.port, directory=args.dir)
+import os
+import re
+import json
+import argparse
+import functools
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+etags_file_name = ".etags.json"
+
+# Preferred first: brotli is smaller when both siblings exist.
+precompressed = (("br", ".br"), ("gzip", ".gz"))
+
+# name.<8 hex of the content hash>.ext, as written by src/assets.py; such a
+# URL never changes content, so clients may cache it for good.
+fingerprinted_pattern = re.compile(r"\.[0-9a-f]{8}\.\w+$")
+immutable_cache_control = "public, max-age=31536000, immutable"
+
+
+class EtagTable:
+    """The build's .etags.json, reloaded whenever its mtime changes."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, etags_file_name)
+        self.lock = threading.Lock()
+        self.mtime_ns = None
+        self.etags = {}
+
+    def get(self, rel_path):
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime_ns != self.mtime_ns:
+            with self.lock:
+                if mtime_ns != self.mtime_ns:
+                    try:
+                        with open(self.path, "r") as file:
+                            self.etags = json.load(file)
+                    except (OSError, ValueError):
+                        self.etags = {}
+                    self.mtime_ns = mtime_ns
+        return self.etags.get(rel_path)
+
+
+def accepted_encodings(header):
+    encodings = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if name and params not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.lower())
+    return encodings
+
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler with keep-alive, conditional GETs and
+    precompressed siblings.
+
+    Strong ETags come from the build's .etags.json when the file still
+    matches the recorded size and mtime; otherwise a weak ETag is derived
+    from the stat. `Accept-Encoding: br/gzip` is answered from `.br`/`.gz`
+    files next to the original when they are at least as new.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY a
+    # keep-alive client waits on delayed ACKs for every response.
+    disable_nagle_algorithm = True
+    etag_table = None
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                return super().send_head()
+            path = index
+
+        rel_path = os.path.relpath(path, self.directory)
+        if any(part.startswith(".") for part in rel_path.split(os.sep)):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        etag = self.etag_for(rel_path.replace(os.sep, "/"), stat)
+        immutable = fingerprinted_pattern.search(rel_path) is not None
+        content_type = self.guess_type(path)
+        encoding = None
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for name, suffix in precompressed:
+            if name not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if compressed_stat.st_mtime_ns >= stat.st_mtime_ns:
+                encoding, path, stat = name, path + suffix, compressed_stat
+                etag = etag[:-1] + "-" + suffix[1:] + '"'
+                break
+
+        if self.not_modified(etag, stat):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            if immutable:
+                self.send_header("Cache-Control", immutable_cache_control)
+            self.end_headers()
+            return None
+
+        try:
+            file = open(path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(stat.st_size))
+        self.send_header("Last-Modified", formatdate(
+            stat.st_mtime, usegmt=True))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        if immutable:
+            self.send_header("Cache-Control", immutable_cache_control)
+        self.end_headers()
+        return file
+
+    def etag_for(self, rel_path, stat):
+        record = self.etag_table.get(rel_path) if self.etag_table else None
+        if record is not None and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+            return f'"{record[2]}"'
+        return f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def not_modified(self, etag, stat):
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            bare = etag[2:] if etag.startswith("W/") else etag
+            return "*" in tags or any(
+                (tag[2:] if tag.startswith("W/") else tag) == bare for tag in tags)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return int(stat.st_mtime) <= since.timestamp()
+        return False
+
+
+def run(
+    server_class=ThreadingHTTPServer,
+    handler_class=SiteRequestHandler,
+    port=8888,
+    directory=None,
+):
+    directory = os.path.abspath(directory or ".")
+    handler_class.etag_table = EtagTable(directory)
+    handler = functools.partial(handler_class, directory=directory)
+    server_address = ("", port)
+    httpd = server_class(server_address, handler)
+    print(
+        f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
+    httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP Server")
+    parser.add_argument(
+        "--dir", type=str, help="Directory to serve files from", default="."
+    )
+    parser.add_argument("--port", type=int,
+                        help="Port to serve HTTP on", default=8888)
+    args = parser.parse_args()
+
+    run(port=args.port, directory=args.dir)
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import re
+
+from manifest import hash_file
+from output import write_file
+from sync import copy_file, remove_file, walk_files
+
+
+fingerprint_extensions = (".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif",
+                          ".svg", ".ico", ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm", ".pdf")
+asset_manifest_name = "asset-manifest.json"
+fingerprint_length = 8
+reference_pattern = re.compile(r'\b(src|href)="(/[^"?#]+)"')
+markdown_url_pattern = re.compile(r"\]\((/[^)\s?#]+)")
+
+
+def fingerprinted_path(rel_path, digest):
+    """ images/kafka.png -> images/kafka.<first 8 hex of the sha256>.png """
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:fingerprint_length]}{ext}"
+
+
+def fingerprint_assets(src, dst, previous=None, link="auto"):
+    """Give every static asset a content-hashed copy next to the plain one.
+
+    `previous` is the record from the last build, {rel_path: [size,
+    mtime_ns, sha256]}; files whose size and mtime are unchanged keep their
+    recorded hash instead of being read again. Copies for content that no
+    longer exists are deleted. Returns (record, urls, written, removed)
+    where urls maps "/index.css" to "/index.3f9a1c2b.css".
+    """
+    previous = previous or {}
+    record = {}
+    urls = {}
+    written = []
+    for rel_path, entry in walk_files(src):
+        if not rel_path.endswith(fingerprint_extensions):
+            continue
+        stat = entry.stat()
+        old = previous.get(rel_path)
+        if old is not None and old[0] == stat.st_size and old[1] == stat.st_mtime_ns:
+            digest = old[2]
+        else:
+            digest = hash_file(entry.path)
+        record[rel_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        target = fingerprinted_path(rel_path, digest)
+        urls["/" + rel_path] = "/" + target
+        dst_path = os.path.join(dst, target)
+        if not os.path.exists(dst_path):
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            copy_file(entry.path, dst_path, link)
+            written.append(dst_path)
+
+    removed = []
+    for rel_path, (_, _, digest) in previous.items():
+        current = record.get(rel_path)
+        if current is None or current[2] != digest:
+            dst_path = os.path.join(dst, fingerprinted_path(rel_path, digest))
+            if os.path.exists(dst_path):
+                remove_file(dst_path, dst)
+                removed.append(dst_path)
+
+    write_file(os.path.join(dst, asset_manifest_name), json.dumps(urls, indent=0, sort_keys=True))
+    return record, urls, written, removed
+
+
+def rewrite_references(html, urls):
+    """ point src="/x" and href="/x" attributes at fingerprinted copies """
+    if not urls:
+        return html
+    return reference_pattern.sub(
+        lambda match: f'{match.group(1)}="{urls.get(match.group(2), match.group(2))}"', html)
+
+
+def referenced_assets(markdown, urls):
+    """Root-relative asset URLs a page links to, mapped to their current fingerprinted URL.
+
+    Assets that do not exist (yet) map to None, so the page is rebuilt
+    when one appears.
+    """
+    return {url: urls.get(url) for url in markdown_url_pattern.findall(markdown)
+            if url.endswith(fingerprint_extensions)}
+
+
+def urls_digest(urls):
+    return hashlib.sha256(json.dumps(urls, sort_keys=True).encode()).hexdigest()[:16]
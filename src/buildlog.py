@@ -0,0 +1,115 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+
+logger = logging.getLogger("ssg")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that hands the record over untouched.
+
+    The stock handler formats the message before enqueueing so records can
+    cross process boundaries; our listener lives in the same process, so
+    all formatting is left to its thread and stays off the render path.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class Progress:
+    """A single self-overwriting "label n/total" line on a terminal.
+
+    Only drawn when stderr is a TTY and per-file logging is off, and
+    redrawn at most every `interval` seconds.
+    """
+
+    def __init__(self, label, total, interval=0.1, stream=None):
+        self.label = label
+        self.total = total
+        self.count = 0
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.enabled = total > 0 and self.stream.isatty(
+        ) and not logger.isEnabledFor(logging.DEBUG)
+        self.last_draw = 0.0
+
+    def update(self, count=1):
+        self.count += count
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self.last_draw >= self.interval or self.count >= self.total:
+            self.last_draw = now
+            self.stream.write(f"\r{self.label} {self.count}/{self.total}")
+            self.stream.flush()
+
+    def done(self):
+        if self.enabled and self.last_draw:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
+
+
+def log_event(level, event, message, *args, **fields):
+    """ log `message % args` with an event name and fields for the JSON log, if anyone listens """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={
+                   "event": event, "fields": fields})
+
+
+_listener = None
+
+
+def configure_logging(verbose=False, json_path=None, stream=None):
+    """Route build logs through a background thread.
+
+    The console gets summaries, or every per-file event with `verbose`;
+    `json_path` receives every event as one JSON object per line.
+    """
+    global _listener
+    shutdown_logging()
+    handlers = []
+
+    console = logging.StreamHandler(stream or sys.stdout)
+    console.setLevel(logging.DEBUG if verbose else logging.INFO)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    handlers.append(console)
+
+    if json_path:
+        json_handler = logging.FileHandler(json_path, mode="w")
+        json_handler.setLevel(logging.DEBUG)
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    records = queue.SimpleQueue()
+    logger.handlers[:] = [DeferredQueueHandler(records)]
+    logger.setLevel(logging.DEBUG if verbose or json_path else logging.INFO)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(
+        records, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """ flush everything still queued and stop the listener thread """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
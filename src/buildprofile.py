@@ -0,0 +1,112 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class BuildProfiler:
+    """Records wall time, CPU time and allocations per page and stage.
+
+    Each measured span becomes a record (page, stage, start_us, wall_us,
+    cpu_us, alloc_bytes, pid, tid). Worker processes build their own
+    profiler and hand their records back with drain(); the parent merges
+    them with extend(). Wall time minus thread CPU time is reported as
+    time spent waiting, which for this pipeline is almost entirely I/O.
+    """
+
+    def __init__(self, allocations=True):
+        self.allocations = allocations
+        self.records = []
+        if allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, page, name):
+        if self.allocations:
+            tracemalloc.reset_peak()
+            alloc_start = tracemalloc.get_traced_memory()[0]
+        cpu_start = time.thread_time_ns()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter_ns() - start
+            cpu = time.thread_time_ns() - cpu_start
+            alloc = 0
+            if self.allocations:
+                alloc = tracemalloc.get_traced_memory()[1] - alloc_start
+            self.records.append((page, name, start // 1000, wall // 1000, cpu // 1000,
+                                 alloc, os.getpid(), threading.get_ident()))
+
+    def drain(self):
+        records, self.records = self.records, []
+        return records
+
+    def extend(self, records):
+        self.records.extend(records)
+
+    def summary(self, wall_seconds, slowest=20):
+        pages = {}
+        stages = {}
+        for page, name, _, wall, cpu, alloc, _, _ in self.records:
+            total = stages.setdefault(name, [0, 0, 0, 0])
+            total[0] += wall
+            total[1] += cpu
+            total[2] += alloc
+            total[3] += 1
+            if page is not None:
+                timings = pages.setdefault(page, {})
+                timings[name] = timings.get(name, 0) + wall
+
+        lines = [f"Profile: {len(pages)} pages in {wall_seconds:.2f}s "
+                 f"({len(pages) / wall_seconds if wall_seconds else 0:.1f} pages/s)", ""]
+        lines.append(
+            f"  {'stage':<14} {'count':>7} {'wall ms':>10} {'cpu ms':>10} {'wait ms':>10} {'alloc MB':>9}")
+        total_wall = total_cpu = 0
+        for name, (wall, cpu, alloc, count) in sorted(stages.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {name:<14} {count:>7} {wall / 1000:>10.1f} {cpu / 1000:>10.1f} "
+                         f"{max(wall - cpu, 0) / 1000:>10.1f} {alloc / 1024 / 1024:>9.1f}")
+            total_wall += wall
+            total_cpu += cpu
+        if total_wall:
+            lines.append("")
+            lines.append(f"  CPU {total_cpu / 1e6:.2f}s, I/O and waiting {max(total_wall - total_cpu, 0) / 1e6:.2f}s "
+                         f"({100 * max(total_wall - total_cpu, 0) / total_wall:.0f}% of measured time)")
+
+        if pages:
+            names = [name for name in stages if any(
+                name in page for page in pages.values())]
+            lines.append("")
+            lines.append(f"  Slowest {min(slowest, len(pages))} pages (ms):")
+            lines.append(f"  {'total':>8} " + " ".join(f"{name:>9}" for name in names) + "  page")
+            ranked = sorted(pages.items(), key=lambda item: -sum(item[1].values()))
+            for page, timings in ranked[:slowest]:
+                lines.append(f"  {sum(timings.values()) / 1000:>8.1f} " +
+                             " ".join(f"{timings.get(name, 0) / 1000:>9.1f}" for name in names) + f"  {page}")
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """ write the records as Chrome trace events (also readable by speedscope) """
+        events = []
+        for page, name, start, wall, cpu, alloc, pid, tid in self.records:
+            events.append({
+                "name": name,
+                "cat": "page" if page is not None else "build",
+                "ph": "X",
+                "ts": start,
+                "dur": wall,
+                "pid": pid,
+                "tid": tid,
+                "args": {"page": page, "cpu_us": cpu, "alloc_bytes": alloc},
+            })
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+def measure(profiler, page, name):
+    """ profiler.stage(page, name), or a no-op when profiling is off """
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(page, name)
@@ -0,0 +1,98 @@
+import concurrent.futures
+import gzip
+import os
+
+from sync import walk_files
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+compressible_extensions = (".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map")
+default_min_size = 1024
+
+
+def gzip_bytes(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    """ (suffix, compress function) for every encoding available here """
+    available = [(".gz", gzip_bytes)]
+    if brotli is not None:
+        available.append((".br", brotli_bytes))
+    return available
+
+
+def compress_file(path, stat, suffix, compress):
+    """Write path + suffix, stamped with the original's mtime.
+
+    Returns False, and removes any old sibling, when compressing does not
+    make the file smaller.
+    """
+    with open(path, "rb") as file:
+        data = compress(file.read())
+    target = path + suffix
+    if len(data) >= stat.st_size:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(tmp_path, target)
+    return True
+
+
+def compress_directory(root, min_size=default_min_size, jobs=None):
+    """Keep .gz (and, with the brotli module, .br) siblings of compressible files current.
+
+    A sibling carries its original's mtime, so it is up to date exactly
+    when the two mtimes match; only missing or stale siblings are
+    recompressed, in a thread pool (zlib and brotli release the GIL).
+    Siblings of files that were removed or fell under `min_size` are
+    deleted. Returns (compressed paths, removed paths).
+    """
+    suffixes = tuple(suffix for suffix, _ in encoders())
+    originals = {}
+    siblings = {}
+    for rel_path, entry in walk_files(root):
+        if rel_path.endswith(compressible_extensions):
+            if entry.name.startswith("."):
+                continue
+            originals[entry.path] = entry.stat()
+        elif rel_path.endswith((".gz", ".br")) and rel_path[:-3].endswith(compressible_extensions):
+            siblings[entry.path] = entry.stat().st_mtime_ns
+
+    removed = []
+    for path in siblings:
+        stat = originals.get(path[:-3])
+        if stat is None or stat.st_size < min_size or not path.endswith(suffixes):
+            os.remove(path)
+            removed.append(path)
+
+    work = []
+    for path, stat in originals.items():
+        if stat.st_size < min_size:
+            continue
+        for suffix, compress in encoders():
+            if siblings.get(path + suffix) != stat.st_mtime_ns:
+                work.append((path, stat, suffix, compress))
+
+    compressed = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(compress_file, *item): item[0] + item[2] for item in work}
+        for future in concurrent.futures.as_completed(futures):
+            if future.result():
+                compressed.append(futures[future])
+    return compressed, removed
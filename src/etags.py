@@ -0,0 +1,43 @@
+import json
+import os
+
+from manifest import hash_file
+from sync import walk_files
+
+etags_file_name = ".etags.json"
+compressed_suffixes = (".gz", ".br")
+
+
+def write_etags(public_dir):
+    """Write strong ETags for every file in public_dir to .etags.json.
+
+    Entries are [size, mtime_ns, etag]; a file is only re-hashed when its
+    size or mtime differ from the previous entry. Precompressed siblings
+    are skipped, the server derives their ETags from the original's.
+    """
+    path = os.path.join(public_dir, etags_file_name)
+    previous = {}
+    if os.path.exists(path):
+        with open(path, "r") as file:
+            previous = json.load(file)
+
+    etags = {}
+    hashed = 0
+    for rel_path, entry in walk_files(public_dir):
+        if rel_path == etags_file_name or rel_path.endswith(compressed_suffixes) or rel_path.endswith(".tmp"):
+            continue
+        stat = entry.stat()
+        record = previous.get(rel_path)
+        if record is not None and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+            etags[rel_path] = record
+        else:
+            etags[rel_path] = [stat.st_size, stat.st_mtime_ns,
+                               hash_file(entry.path)[:20]]
+            hashed += 1
+
+    if etags != previous:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(etags, file)
+        os.replace(tmp_path, path)
+    return hashed
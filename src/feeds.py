@@ -0,0 +1,164 @@
+import datetime
+import email.utils
+import filecmp
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+
+sitemap_limit = 50000
+feed_size = 20
+feed_files = ("sitemap.xml", "feed.xml", "atom.xml")
+
+
+def parse_date(value):
+    """ an ISO 8601 front matter date as an aware datetime (naive means UTC), or None """
+    if not value:
+        return None
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    return date
+
+
+def mtime_date(mtime_ns):
+    return datetime.datetime.fromtimestamp(mtime_ns / 1e9, datetime.timezone.utc)
+
+
+def replace_if_changed(tmp_path, path):
+    """ rename tmp_path over path, or drop it when path already has the same bytes, keeping its mtime """
+    if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+class AtomicWriter:
+    """ a text file written under a temporary name and renamed into place on close, if it changed """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path + ".tmp", "w", buffering=1 << 16, encoding="utf-8")
+        self.write = self.file.write
+
+    def close(self):
+        self.file.close()
+        replace_if_changed(self.path + ".tmp", self.path)
+
+
+def write_sitemaps(urls, dest_dir_path, base_url, limit=sitemap_limit):
+    """Stream (url, lastmod) pairs into sitemap.xml.
+
+    Up to `limit` URLs go into sitemap.xml directly. Beyond that they are
+    written to sitemap-1.xml, sitemap-2.xml, ... as they arrive and
+    sitemap.xml becomes a sitemap index; only the current shard is open,
+    so memory stays flat however many pages the site has. Returns the
+    number of URLs written.
+    """
+    base_url = base_url.rstrip("/")
+    shards = []
+    shard = None
+    count = 0
+    for url, lastmod in urls:
+        if count % limit == 0:
+            if shard is not None:
+                shard.write("</urlset>\n")
+                shard.close()
+            shards.append(os.path.join(
+                dest_dir_path, f"sitemap-{len(shards) + 1}.xml"))
+            shard = AtomicWriter(shards[-1])
+            shard.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        shard.write(f"<url><loc>{escape(base_url + url)}</loc>")
+        if lastmod is not None:
+            shard.write(f"<lastmod>{lastmod.date().isoformat()}</lastmod>")
+        shard.write("</url>\n")
+        count += 1
+    if shard is not None:
+        shard.write("</urlset>\n")
+        shard.close()
+
+    index_path = os.path.join(dest_dir_path, "sitemap.xml")
+    number = len(shards) + 1
+    if len(shards) <= 1:
+        if shards:
+            replace_if_changed(shards[0], index_path)
+        else:
+            sitemap = AtomicWriter(index_path)
+            sitemap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                          '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n</urlset>\n')
+            sitemap.close()
+    else:
+        sitemap = AtomicWriter(index_path)
+        sitemap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                      '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        for path in shards:
+            sitemap.write(
+                f"<sitemap><loc>{escape(base_url + '/' + os.path.basename(path))}</loc></sitemap>\n")
+        sitemap.write("</sitemapindex>\n")
+        sitemap.close()
+
+    while os.path.exists(os.path.join(dest_dir_path, f"sitemap-{number}.xml")):
+        os.remove(os.path.join(dest_dir_path, f"sitemap-{number}.xml"))
+        number += 1
+    return count
+
+
+def write_rss(entries, path, base_url, title, size=feed_size):
+    """ stream the newest `size` dated entries into an RSS 2.0 feed """
+    base_url = base_url.rstrip("/")
+    feed = AtomicWriter(path)
+    feed.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+               f"<title>{escape(title)}</title><link>{escape(base_url + '/')}</link>"
+               f"<description>{escape(title)}</description>\n")
+    for entry in entries[:size]:
+        link = escape(base_url + entry["url"])
+        feed.write(f"<item><title>{escape(entry['title'] or entry['url'])}</title>"
+                   f"<link>{link}</link><guid>{link}</guid>"
+                   f"<pubDate>{email.utils.format_datetime(parse_date(entry['date']))}</pubDate>")
+        if entry.get("summary"):
+            feed.write(f"<description>{escape(str(entry['summary']))}</description>")
+        feed.write("</item>\n")
+    feed.write("</channel></rss>\n")
+    feed.close()
+
+
+def write_atom(entries, path, base_url, title, size=feed_size, updated=None):
+    """Stream the newest `size` dated entries into an Atom feed.
+
+    The feed's <updated> is the newest entry's date. Without entries it is
+    `updated`, or the epoch, never the current time: an unchanged site
+    must produce the same bytes.
+    """
+    base_url = base_url.rstrip("/")
+    entries = entries[:size]
+    if entries:
+        updated = parse_date(entries[0]["date"])
+    elif updated is None:
+        updated = mtime_date(0)
+    feed = AtomicWriter(path)
+    feed.write('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+               f"<title>{escape(title)}</title><id>{escape(base_url + '/')}</id>"
+               f"<link href={quoteattr(base_url + '/')}/>"
+               f"<link rel=\"self\" href={quoteattr(base_url + '/' + os.path.basename(path))}/>"
+               f"<updated>{updated.isoformat()}</updated><author><name>{escape(title)}</name></author>\n")
+    for entry in entries:
+        link = base_url + entry["url"]
+        feed.write(f"<entry><title>{escape(entry['title'] or entry['url'])}</title>"
+                   f"<id>{escape(link)}</id><link href={quoteattr(link)}/>"
+                   f"<updated>{parse_date(entry['date']).isoformat()}</updated>")
+        if entry.get("summary"):
+            feed.write(f"<summary>{escape(str(entry['summary']))}</summary>")
+        feed.write("</entry>\n")
+    feed.write("</feed>\n")
+    feed.close()
+
+
+def site_urls(index, listing_urls, drafts=False):
+    """ (url, lastmod) for every published page, then every listing page """
+    for _, entry in sorted(index.published(drafts)):
+        yield entry["url"], parse_date(entry["date"]) or mtime_date(entry["mtime_ns"])
+    for url in sorted(listing_urls):
+        yield url, None
@@ -0,0 +1,148 @@
+import collections
+import hashlib
+import os
+import sqlite3
+import time
+
+from manifest import generator_version
+
+
+default_cache_path = os.path.join(".cache", "fragments.sqlite")
+default_max_bytes = 64 * 1024 * 1024
+
+
+def fragment_key(*parts):
+    """ content address of a block: a 16-byte digest of its parts """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class FragmentCache:
+    """Rendered HTML per block, keyed by the block's content.
+
+    Lookups go to an in-memory LRU first and then to a SQLite table that
+    survives between builds and is shared by worker processes. New
+    fragments and the last-used times of disk hits are buffered and
+    written in one transaction by flush(). prune() evicts the least
+    recently used fragments once the table outgrows `max_bytes`. The
+    whole table is dropped when the generator version changes.
+    """
+
+    def __init__(self, path=default_cache_path, version=None, memory_items=4096, max_bytes=default_max_bytes):
+        self.path = path
+        self.memory_items = memory_items
+        self.max_bytes = max_bytes
+        self.memory = collections.OrderedDict()
+        self.pending = {}
+        self.touched = set()
+        self.stats = collections.Counter()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=60)
+        with self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS fragments (key BLOB PRIMARY KEY, html TEXT NOT NULL, "
+                "size INTEGER NOT NULL, used INTEGER NOT NULL)")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS fragments_used ON fragments (used)")
+            version = version or generator_version()
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None or row[0] != version:
+                self.connection.execute("DELETE FROM fragments")
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+
+    def remember(self, key, html):
+        self.memory[key] = html
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """ return {key: html} for every key found in memory or on disk """
+        found = {}
+        missing = []
+        for key in set(keys):
+            html = self.memory.get(key)
+            if html is not None:
+                self.memory.move_to_end(key)
+                found[key] = html
+            elif key in self.pending:
+                found[key] = self.pending[key]
+            else:
+                missing.append(key)
+        self.stats["memory_hits"] += len(found)
+
+        disk_hits = 0
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT key, html FROM fragments WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, html in rows:
+                found[key] = html
+                self.remember(key, html)
+                self.touched.add(key)
+                disk_hits += 1
+        self.stats["disk_hits"] += disk_hits
+        self.stats["misses"] += len(missing) - disk_hits
+        return found
+
+    def put(self, key, html):
+        self.remember(key, html)
+        self.pending[key] = html
+
+    def flush(self):
+        """ write new fragments and refresh the last-used time of disk hits """
+        if not self.pending and not self.touched:
+            return
+        now = int(time.time())
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?)",
+                [(key, html, len(html), now) for key, html in self.pending.items()])
+            self.connection.executemany(
+                "UPDATE fragments SET used = ? WHERE key = ?",
+                [(now, key) for key in self.touched])
+        self.stats["written"] += len(self.pending)
+        self.pending.clear()
+        self.touched.clear()
+
+    def prune(self):
+        """ evict least recently used fragments until the table fits in max_bytes """
+        self.flush()
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM fragments").fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return 0
+        evicted = []
+        for key, size in self.connection.execute("SELECT key, size FROM fragments ORDER BY used"):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM fragments WHERE key = ?", evicted)
+        self.stats["evicted"] += len(evicted)
+        return len(evicted)
+
+    def drain_stats(self):
+        stats, self.stats = self.stats, collections.Counter()
+        return stats
+
+    def usage(self):
+        """ (fragments, bytes) currently stored on disk """
+        return self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM fragments").fetchone()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,150 @@
+import datetime
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+delimiters = {"---": "yaml", "+++": "toml"}
+
+
+def parse_simple_yaml(text):
+    """ the `key: value` subset of YAML, with [a, b] and `- item` lists """
+    metadata = {}
+    key = None
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if stripped.startswith("- ") and key is not None:
+            if not isinstance(metadata[key], list):
+                metadata[key] = []
+            metadata[key].append(stripped[2:].strip().strip("\"'"))
+            continue
+        key, sep, value = line.partition(":")
+        key = key.strip()
+        if not sep or not key:
+            key = None
+            continue
+        value = value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            metadata[key] = [item.strip().strip("\"'")
+                             for item in value[1:-1].split(",") if item.strip()]
+        else:
+            metadata[key] = value.strip("\"'")
+    return metadata
+
+
+def parse_header(text, syntax):
+    if syntax == "toml":
+        if tomllib is None:
+            raise ValueError("TOML front matter needs Python 3.11 or the tomli package")
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError as error:
+            raise ValueError(f"Invalid TOML front matter: {error}")
+    if yaml is None:
+        return parse_simple_yaml(text)
+    try:
+        metadata = yaml.safe_load(text)
+    except yaml.YAMLError as error:
+        raise ValueError(f"Invalid YAML front matter: {error}")
+    if metadata is None:
+        return {}
+    if not isinstance(metadata, dict):
+        raise ValueError("Front matter must be a mapping")
+    return metadata
+
+
+def normalize_metadata(metadata):
+    """Coerce the fields the generator uses to plain types.
+
+    `date` becomes an ISO 8601 string, `tags` a list of strings (a comma
+    separated string is split, any other single value is one tag) and
+    `draft` a bool. Other keys are kept.
+    """
+    metadata = dict(metadata)
+    date = metadata.get("date")
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        metadata["date"] = date.isoformat()
+    elif date is not None:
+        metadata["date"] = str(date)
+    tags = metadata.get("tags")
+    if isinstance(tags, str):
+        metadata["tags"] = [tag.strip() for tag in tags.split(",") if tag.strip()]
+    elif isinstance(tags, (list, tuple)):
+        metadata["tags"] = [str(tag) for tag in tags]
+    elif tags is not None:
+        metadata["tags"] = [str(tags)]
+    draft = metadata.get("draft")
+    if isinstance(draft, str):
+        metadata["draft"] = draft.strip().lower() in ("true", "yes", "on", "1")
+    elif draft is not None:
+        metadata["draft"] = bool(draft)
+    for key in ("title", "template"):
+        if key in metadata and metadata[key] is not None:
+            metadata[key] = str(metadata[key])
+    return metadata
+
+
+def split_front_matter(markdown):
+    """Split a leading front matter header off the markdown.
+
+    Returns (metadata, body). The header is YAML between `---` lines or
+    TOML between `+++` lines; without PyYAML only `key: value` lines and
+    simple lists are understood. Markdown without a header is returned
+    unchanged with empty metadata.
+    """
+    syntax = delimiters.get(markdown[:3])
+    if syntax is None or markdown[3:4] != "\n":
+        return {}, markdown
+    end = markdown.find(f"\n{markdown[:3]}\n", 3)
+    if end == -1:
+        if not markdown.endswith(f"\n{markdown[:3]}"):
+            return {}, markdown
+        end = len(markdown) - 4
+    metadata = parse_header(markdown[4:end], syntax)
+    return normalize_metadata(metadata), markdown[end + 5:]
+
+
+def read_front_matter(path):
+    """Read only the header of a markdown file, and its title.
+
+    Returns the normalized metadata. Unless the header has a `title`,
+    lines are read up to the first `# ` heading, which normally follows
+    the header immediately, so the rest of the file is never read.
+    """
+    with open(path, "r") as file:
+        line = file.readline()
+        metadata = {}
+        delimiter = line.rstrip("\n")
+        syntax = delimiters.get(delimiter)
+        if syntax is not None:
+            lines = []
+            line = file.readline()
+            while line and line.rstrip("\n") != delimiter:
+                lines.append(line)
+                line = file.readline()
+            if line:
+                try:
+                    metadata = normalize_metadata(parse_header("".join(lines), syntax))
+                except ValueError as error:
+                    raise ValueError(f"{path}: {error}")
+                line = file.readline()
+            else:
+                file.seek(0)
+                line = file.readline()
+        if metadata.get("title") is None:
+            while line:
+                if line.startswith("# "):
+                    metadata["title"] = line[2:].rstrip("\n")
+                    break
+                line = file.readline()
+    return metadata
@@ -0,0 +1,69 @@
+import functools
+import html
+import os
+import re
+
+from htmlnode import Raw
+from output import write_file
+
+try:
+    import pygments
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:
+    pygments = None
+
+
+language_pattern = re.compile(r"[\w+#.-]+")
+highlight_memo_size = 1024
+stylesheet_name = "highlight.css"
+default_style = "default"
+# part of the fragment cache key of code blocks, so upgrading Pygments re-renders them
+version = pygments.__version__ if pygments is not None else ""
+
+
+def fence_language(fence):
+    """ "```python" -> "python"; an empty string when the fence names no usable language """
+    words = fence[3:].split()
+    if not words or language_pattern.fullmatch(words[0]) is None:
+        return ""
+    return words[0].lower()
+
+
+@functools.lru_cache(maxsize=None)
+def _formatter():
+    return HtmlFormatter(nowrap=True)
+
+
+@functools.lru_cache(maxsize=highlight_memo_size)
+def highlight(code, language):
+    """Return the inner HTML of a code block, marked Raw: highlighted spans, or the escaped code.
+
+    Memoized on (code, language), since the same snippets recur across
+    pages and lexing is the most expensive per-block step. Unknown
+    languages, and every language without Pygments, are only escaped.
+    """
+    if pygments is not None and language:
+        try:
+            lexer = get_lexer_by_name(language, stripnl=False, ensurenl=False)
+        except ClassNotFound:
+            lexer = None
+        if lexer is not None:
+            return Raw(pygments.highlight(code, lexer, _formatter()))
+    return Raw(html.escape(code, quote=False))
+
+
+def write_stylesheet(dest_dir_path, style=default_style):
+    """Write highlight.css for the token classes, unless it is already current.
+
+    The file is written even without Pygments, so a template can always
+    link it. Returns True when the file was (re)written.
+    """
+    css = "/* syntax highlighting needs Pygments */\n"
+    if pygments is not None:
+        try:
+            css = HtmlFormatter(style=style).get_style_defs(".highlight") + "\n"
+        except ClassNotFound:
+            raise ValueError(f"unknown highlight style '{style}'")
+    return write_file(os.path.join(dest_dir_path, stylesheet_name), css)
@@ -1,4 +1,44 @@
+class Raw(str):
+    """ a string of markup that is already safe; the serializer writes it as it is """
+    __slots__ = ()
+
+
+# elements that have no content and no closing tag
+void_elements = frozenset(["area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source",
+                           "track", "wbr"])
+
+
+def escape_text(text):
+    """Escape &, < and > for element content.
+
+    Raw strings, and most text, which contains none of them, are returned
+    untouched without allocating; three substring scans decide that up
+    front. LeafNode.to_html inlines the same test to save the call. Values
+    that are not strings, such as numbers, are converted with str() first.
+    """
+    if type(text) is not str:
+        if type(text) is Raw:
+            return text
+        text = str(text)
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    """ like escape_text, and quotes too, for a double-quoted attribute value """
+    if type(value) is not str:
+        if type(value) is Raw:
+            return value
+        value = str(value)
+    if '"' not in value and "&" not in value and "<" not in value and ">" not in value:
+        return value
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -6,58 +46,124 @@ class HTMLNode:
         self.props = props
 
     def to_html(self):
+        parts = []
+        self.render(parts.append)
+        return "".join(parts)
+
+    def write_html(self, file):
+        """ stream the HTML into a file-like object instead of building a string """
+        self.render(file.write)
+
+    def render(self, write):
         raise NotImplementedError("to_html method not implemented")
 
     def props_to_html(self):
         if self.props is None:
             return ""
-        props_html = ""
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-        return props_html
+        return "".join([f' {prop}="{value}"' if type(value) is str and '"' not in value and "&" not in value
+                        and "<" not in value and ">" not in value else f' {prop}="{escape_attribute(value)}"'
+                        for prop, value in self.props.items()])
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
 
     def __eq__(self, other):
         if not isinstance(other, LeafNode):
             return False
-        return self.tag == self.tag and self.value == self.value and self.props == self.props
+        return self.tag == other.tag and self.value == other.value and self.props == other.props
 
     def to_html(self):
         if self.value is None:
             raise ValueError("Invalid HTML: no value")
+        value = self.value
+        if type(value) is not str or "&" in value or "<" in value or ">" in value:
+            value = escape_text(value)
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        if self.tag in void_elements:
+            return f"<{self.tag}{self.props_to_html()}>"
+        if self.props is None:
+            return f"<{self.tag}>{value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html()}>{value}</{self.tag}>"
+
+    def render(self, write):
+        write(self.to_html())
 
     def __repr__(self):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
+class EscapedLeafNode(LeafNode):
+    """A LeafNode whose value and props were escaped when it was built.
+
+    Inline markdown is escaped once, as its leaves are made (and memoized),
+    so these are serialized as they are, with no checks at all. Raw values
+    would carry the same promise, but formatting a str subclass into an
+    f-string copies it, which costs more than the check it saves.
+    """
+    __slots__ = ()
+
+    def to_html(self):
+        if self.value is None:
+            raise ValueError("Invalid HTML: no value")
+        if self.tag is None:
+            return self.value
+        if self.props is None:
+            props = ""
+        else:
+            props = "".join([f' {prop}="{value}"' for prop, value in self.props.items()])
+        if self.tag in void_elements:
+            return f"<{self.tag}{props}>"
+        return f"<{self.tag}{props}>{self.value}</{self.tag}>"
+
+
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
-        super().__init__(tag, None, children, props)
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
 
     def __eq__(self, other):
         if not isinstance(other, ParentNode):
             return False
-        return (self.tag == self.tag and self.children == self.children and self.props == self.props)
+        return (self.tag == other.tag and self.children == other.children and self.props == other.props)
 
-    def to_html(self):
+    def render(self, write):
+        if self.tag is None:
+            raise ValueError("Invalid HTML: no tag")
+        if self.children is None:
+            raise ValueError("Invalid HTML: no children")
+        write(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child.render(write)
+        write(f"</{self.tag}>")
+
+    def write_html(self, file):
+        """ like HTMLNode.write_html, but hands the file one child's HTML at a time, fewer and larger writes """
         if self.tag is None:
             raise ValueError("Invalid HTML: no tag")
         if self.children is None:
             raise ValueError("Invalid HTML: no children")
-        children_html = ""
+        parts = [f"<{self.tag}{self.props_to_html()}>"]
         for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child.render(parts.append)
+            file.write("".join(parts))
+            parts.clear()
+        parts.append(f"</{self.tag}>")
+        file.write("".join(parts))
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
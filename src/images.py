@@ -0,0 +1,152 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+
+from sync import copy_file, remove_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+image_extensions = (".png", ".jpg", ".jpeg", ".webp")
+default_cache_dir = ".cache/images"
+variant_widths = (480, 960, 1600)
+variant_quality = 80
+
+
+def variant_key(digest, widths=variant_widths, quality=variant_quality):
+    """ cache key of an image's variants: its content hash plus everything that shapes the output """
+    parts = [digest, ",".join(map(str, widths)), "webp", str(quality), Image.__version__]
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()[:16]
+
+
+def variant_path(rel_path, key, width):
+    """ images/kafka.png -> images/kafka-960w.<first 8 of the key>.webp """
+    return f"{os.path.splitext(rel_path)[0]}-{width}w.{key[:8]}.webp"
+
+
+def encode_variants(path, cache_dir, key, widths=variant_widths, quality=variant_quality):
+    """Write WebP copies of one image into cache_dir, one per width below its own plus full size.
+
+    Runs in a worker process. Returns [width, height, [[variant width,
+    file name], ...]], or None when the file cannot be decoded. Images are
+    never scaled up, and animated images get no variants.
+    """
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            if getattr(image, "is_animated", False):
+                return [width, height, []]
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    variants = []
+    for target in [w for w in widths if w < width] + [width]:
+        name = f"{key}-{target}.webp"
+        resized = image if target == width else image.resize(
+            (target, max(1, round(height * target / width))), Image.LANCZOS)
+        tmp_path = os.path.join(cache_dir, f"{name}.{os.getpid()}.tmp")
+        resized.save(tmp_path, "WEBP", quality=quality, method=6)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+        variants.append([target, name])
+    return [width, height, variants]
+
+
+class ImageCache:
+    """Encoded variants under cache_dir, indexed by variant_key.
+
+    The cache outlives the build manifest: it does not depend on the
+    generator version, so editing the generator never re-encodes an
+    image, and reverting an image finds its old variants again.
+    """
+
+    def __init__(self, cache_dir=default_cache_dir):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, "index.json")
+        self.entries = {}
+        try:
+            with open(self.path, "r") as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            pass
+
+    def has(self, key):
+        """ whether key was processed before; an image that failed to decode stays recorded as None """
+        if key not in self.entries:
+            return False
+        entry = self.entries[key]
+        return entry is None or all(
+            os.path.exists(os.path.join(self.cache_dir, name)) for _, name in entry[2])
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.entries, file)
+        os.replace(tmp_path, self.path)
+
+
+def process_images(src, dst, assets, previous=None, cache_dir=default_cache_dir, jobs=None, link="auto"):
+    """Publish resized WebP variants of the raster images among the fingerprinted assets.
+
+    `assets` is the fingerprint record, {rel_path: [size, mtime_ns,
+    sha256]}, so no image is hashed twice. Images whose variants are not
+    in the cache are encoded in a process pool; the others are only
+    linked into dst. Variants of images that changed or disappeared are
+    deleted. Returns (record, written, removed, failed) where record maps
+    rel_path to {"key", "width", "height", "variants": [[url, width]]}.
+    Without Pillow there is nothing to do and the record is empty.
+    """
+    previous = previous or {}
+    record = {}
+    written = []
+    failed = []
+    if Image is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache = ImageCache(cache_dir)
+        keys = {rel_path: variant_key(digest) for rel_path, (_, _, digest) in assets.items()
+                if rel_path.lower().endswith(image_extensions)}
+        work = {key: rel_path for rel_path, key in keys.items() if not cache.has(key)}
+        if work:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {executor.submit(encode_variants, os.path.join(src, rel_path), cache_dir, key): key
+                           for key, rel_path in work.items()}
+                for future in concurrent.futures.as_completed(futures):
+                    cache.entries[futures[future]] = future.result()
+            cache.save()
+
+        for rel_path, key in sorted(keys.items()):
+            entry = cache.entries[key]
+            if entry is None:
+                failed.append(rel_path)
+                continue
+            width, height, variants = entry
+            urls = []
+            for target, name in variants:
+                target_path = variant_path(rel_path, key, target)
+                dst_path = os.path.join(dst, target_path)
+                if not os.path.exists(dst_path):
+                    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                    copy_file(os.path.join(cache_dir, name), dst_path, link)
+                    written.append(dst_path)
+                urls.append(["/" + target_path, target])
+            record[rel_path] = {"key": key, "width": width, "height": height, "variants": urls}
+
+    current = {url for entry in record.values() for url, _ in entry["variants"]}
+    removed = []
+    for entry in previous.values():
+        for url, _ in entry["variants"]:
+            dst_path = os.path.join(dst, url[1:])
+            if url not in current and os.path.exists(dst_path):
+                remove_file(dst_path, dst)
+                removed.append(dst_path)
+    return record, written, removed, failed
+
+
+def image_attributes(record):
+    """ "/images/kafka.png" -> (width, height, srcset) for the markdown renderer """
+    return {"/" + rel_path: (entry["width"], entry["height"],
+                             ", ".join(f"{url} {width}w" for url, width in entry["variants"]))
+            for rel_path, entry in record.items()}
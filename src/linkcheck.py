@@ -0,0 +1,101 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+from assets import asset_manifest_name, fingerprinted_path
+from pageindex import page_url
+from textnode import inline_pattern
+
+
+def page_links(markdown, first_line=1):
+    """Return [url, line] for every link and image the page will emit.
+
+    Lines are scanned the way scan_blocks and text_to_textnodes read them:
+    fenced code blocks are skipped, and a link inside bold, italic or
+    inline code is plain text, not a link. `first_line` is the source line
+    the markdown starts on (after any front matter).
+    """
+    links = []
+    in_code = False
+    in_block = False
+    for number, line in enumerate(markdown.split("\n"), first_line):
+        if in_code:
+            if line.startswith("```"):
+                in_code = False
+                in_block = False
+            continue
+        if not line or line.isspace():
+            in_block = False
+            continue
+        if not in_block and line.startswith("```"):
+            in_code = True
+            continue
+        in_block = not line.startswith("#")
+        if "](" not in line:
+            continue
+        for match in inline_pattern.finditer(line):
+            if match.lastgroup in ("link_url", "image_url"):
+                links.append([match.group(match.lastgroup), number])
+    return links
+
+
+def site_targets(dest_dir_path, manifest, extra_targets=()):
+    """Paths below dest_dir_path that this build produced or copied.
+
+    Taken from the manifest (pages, listings, static files and their
+    fingerprinted copies) plus `extra_targets`, so nothing is read from
+    disk.
+    """
+    targets = {asset_manifest_name, *extra_targets}
+    for entry in manifest.pages.values():
+        targets.add(os.path.relpath(manifest.output_path(entry["dest"]), dest_dir_path).replace(os.sep, "/"))
+    for rel_path in manifest.listings:
+        targets.add(rel_path.replace(os.sep, "/"))
+    targets.update(manifest.static)
+    for rel_path, (_, _, digest) in manifest.assets.items():
+        targets.add(fingerprinted_path(rel_path, digest))
+    return targets
+
+
+def resolve(url, base_url, targets):
+    """ True if an internal URL points at a target; external URLs always pass """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return True
+    path = unquote(parts.path)
+    if not path.startswith("/"):
+        path = posixpath.join(posixpath.dirname(base_url), path)
+    trailing = path.endswith("/")
+    path = posixpath.normpath(path).lstrip("/")
+    if path in ("", "."):
+        return "index.html" in targets
+    if not trailing and path in targets:
+        return True
+    return f"{path}/index.html" in targets
+
+
+def find_broken_links(manifest, dest_dir_path, extra_targets=()):
+    """Check every recorded link of every page against the build's outputs.
+
+    Returns ([(source, line, url)], links checked). Each link costs a
+    couple of set lookups, so the check is linear in the number of links;
+    root-relative URLs resolve the same from every page and are looked up
+    once.
+    """
+    targets = site_targets(dest_dir_path, manifest, extra_targets)
+    absolute = {}
+    broken = []
+    checked = 0
+    for source_path, entry in sorted(manifest.pages.items()):
+        base_url = page_url(manifest.output_path(entry["dest"]), dest_dir_path)
+        for url, line in entry.get("links", ()):
+            checked += 1
+            if url.startswith("/"):
+                found = absolute.get(url)
+                if found is None:
+                    found = absolute[url] = resolve(url, base_url, targets)
+            else:
+                found = resolve(url, base_url, targets)
+            if not found:
+                broken.append((source_path, line, url))
+    return broken, checked
@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import re
+
+from htmlnode import LeafNode, ParentNode, escape_text
+from output import write_file
+from sync import remove_file
+
+
+default_per_page = 20
+slug_pattern = re.compile(r"[\W_]+")
+
+
+def slugify(text):
+    """ "C++ & Web" -> "c-web"; letters and digits of any script are kept, so "日本語" stays as it is """
+    return slug_pattern.sub("-", text.lower()).strip("-") or "-"
+
+
+def unique_slugs(names):
+    """ name -> slug, numbering the later of names whose slugs collide in sorted order ("c#" -> c, "c++" -> c-2) """
+    slugs = {}
+    used = set()
+    for name in sorted(names):
+        slug = base = slugify(name)
+        number = 1
+        while slug in used:
+            number += 1
+            slug = f"{base.rstrip('-')}-{number}"
+        used.add(slug)
+        slugs[name] = slug
+    return slugs
+
+
+class ListingPage:
+    """One generated page of a listing: its URL, title, entries and nav links."""
+
+    __slots__ = ("url", "title", "entries", "newer_url", "older_url")
+
+    def __init__(self, url, title, entries, newer_url=None, older_url=None):
+        self.url = url
+        self.title = title
+        self.entries = entries
+        self.newer_url = newer_url
+        self.older_url = older_url
+
+    def digest(self):
+        """ hash of everything the page shows, so unchanged listings are not rewritten """
+        shown = [self.title, self.newer_url, self.older_url,
+                 [(entry["url"], entry["title"], entry["date"]) if isinstance(entry, dict) else entry
+                  for entry in self.entries]]
+        return hashlib.sha256(json.dumps(shown).encode()).hexdigest()
+
+
+def paginate(url, title, entries, per_page=default_per_page):
+    """Split newest-first entries into ListingPages with stable numbering.
+
+    Numbered pages are filled from the oldest entry: /page/1/ always holds
+    the oldest `per_page` entries. The front page at `url` takes the
+    newest 1..per_page entries that do not fill a numbered page yet, so
+    adding a post rewrites only the front page (and, once it overflows,
+    one new numbered page) instead of shifting every archive page.
+    """
+    count = len(entries)
+    if not count:
+        return []
+    numbered = max(0, (count - 1) // per_page)
+
+    def page_url(number):
+        return url if number > numbered else f"{url}page/{number}/"
+
+    pages = [ListingPage(url, title, entries[:count - numbered * per_page],
+                         older_url=page_url(numbered) if numbered else None)]
+    for number in range(numbered, 0, -1):
+        end = count - (number - 1) * per_page
+        pages.append(ListingPage(page_url(number), f"{title} (page {number})",
+                                 entries[end - per_page:end],
+                                 newer_url=page_url(number + 1),
+                                 older_url=page_url(number - 1) if number > 1 else None))
+    return pages
+
+
+def listing_pages(index, per_page=default_per_page, drafts=False):
+    """Every listing the page index implies.
+
+    An archive of dated pages, a page per tag plus a tag overview, and a
+    listing for each section (directory) that has no index page of its
+    own. Only index entries are used; no page body is read.
+    """
+    pages = index.by_date(drafts)
+    entries = [entry for _, entry in pages]
+    pages_urls = {entry["url"] for entry in entries}
+    listings = []
+
+    listings.extend(paginate("/archive/", "Archive",
+                             [entry for entry in entries if entry["date"]], per_page))
+
+    tags = index.tags(drafts)
+    if tags:
+        slugs = unique_slugs(tags)
+        listings.append(ListingPage("/tags/", "Tags", [
+            (f"/tags/{slugs[tag]}/", tag, len(tagged)) for tag, tagged in sorted(tags.items())]))
+        for tag, tagged in sorted(tags.items()):
+            listings.extend(paginate(f"/tags/{slugs[tag]}/", f"Tagged {tag}",
+                                     [entry for _, entry in tagged], per_page))
+
+    sections = {}
+    for entry in entries:
+        section = entry["url"].rsplit("/", 1)[0] + "/"
+        if section != "/" and section != entry["url"]:
+            sections.setdefault(section, []).append(entry)
+    for section, section_entries in sorted(sections.items()):
+        if section not in pages_urls:
+            title = section.strip("/").rsplit("/", 1)[-1].replace("-", " ").capitalize()
+            listings.extend(paginate(section, title, section_entries, per_page))
+
+    return [listing for listing in listings if listing.url not in pages_urls]
+
+
+def listing_node(listing):
+    items = []
+    for entry in listing.entries:
+        if isinstance(entry, dict):
+            children = [LeafNode("a", entry["title"] or entry["url"], {"href": entry["url"]})]
+            if entry["date"]:
+                children.append(LeafNode(None, " "))
+                children.append(LeafNode("time", entry["date"], {"datetime": entry["date"]}))
+        else:
+            url, name, count = entry
+            children = [LeafNode("a", name, {"href": url}), LeafNode(None, f" ({count})")]
+        items.append(ParentNode("li", children))
+    children = [LeafNode("h1", listing.title)]
+    if items:
+        children.append(ParentNode("ul", items, {"class": "listing"}))
+    nav = []
+    if listing.newer_url:
+        nav.append(LeafNode("a", "Newer", {"href": listing.newer_url, "rel": "prev"}))
+    if listing.older_url:
+        nav.append(LeafNode("a", "Older", {"href": listing.older_url, "rel": "next"}))
+    if nav:
+        children.append(ParentNode("nav", nav, {"class": "pagination"}))
+    return ParentNode("div", children)
+
+
+def listing_dest_path(url, dest_dir_path):
+    return os.path.join(dest_dir_path, *url.strip("/").split("/"), "index.html")
+
+
+def generate_listings(index, template, dest_dir_path, previous=None, force=False,
+                      per_page=default_per_page, drafts=False):
+    """Write the listing pages whose contents changed.
+
+    `previous` maps listing outputs, relative to dest_dir_path, to the
+    digests recorded by the last build. Returns (record, written, removed)
+    where record is the new mapping to store.
+    """
+    previous = previous or {}
+    record = {}
+    written = []
+    for listing in listing_pages(index, per_page, drafts):
+        rel_path = listing_dest_path(listing.url, "")
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        digest = hashlib.sha256(
+            (listing.digest() + template.digest).encode()).hexdigest()
+        record[rel_path] = digest
+        if not force and previous.get(rel_path) == digest and os.path.exists(dest_path):
+            continue
+        if write_file(dest_path, template.render(
+                {"Title": escape_text(listing.title), "Content": listing_node(listing)})):
+            written.append(dest_path)
+
+    removed = []
+    for rel_path in previous:
+        dest_path = os.path.join(dest_dir_path, rel_path)
+        if rel_path not in record and os.path.exists(dest_path):
+            remove_file(dest_path, dest_dir_path)
+            removed.append(dest_path)
+    return record, written, removed
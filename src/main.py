@@ -1,75 +1,685 @@
+import argparse
+import concurrent.futures
+import logging
 import os
-import shutil
+import time
 from pathlib import Path
-from textnode import markdown_to_html_node
+from textnode import drain_inline_stats, markdown_to_html_node, merge_inline_stats, set_asset_urls
+from manifest import BuildManifest
+from fragcache import FragmentCache, default_max_bytes
+from frontmatter import split_front_matter
+from pageindex import PageIndex, page_url
+from feeds import feed_files, feed_size, mtime_date, parse_date, site_urls, write_atom, write_rss, write_sitemaps
+from listings import default_per_page, generate_listings
+from template import TemplateLoader
+from htmlnode import escape_text
+from output import StagedOutput, stream_file
+from sync import remove_file, sync_directory
+from etags import write_etags
+from compress import compress_directory, default_min_size
+from linkcheck import find_broken_links, page_links
+from images import image_attributes, process_images
+from highlight import default_style, write_stylesheet
+from assets import fingerprint_assets, referenced_assets, urls_digest
+from buildprofile import BuildProfiler, measure
+from buildlog import Progress, configure_logging, log_event, shutdown_logging
+from watch import DependencyGraph, create_watcher, page_dependencies, wait_for_changes
+
+
+broken_link_warnings = 50
 
 
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:]
-    raise Exception("No H1 header found in the markdown file.")
-
-
-def copy_directory(src, dst):
-    if os.path.exists(dst):
-        shutil.rmtree(dst)
-    os.mkdir(dst)
-    for item in os.listdir(src):
-        s = os.path.join(src, item)
-        d = os.path.join(dst, item)
-        if os.path.isdir(s):
-            copy_directory(s, d)
+    """ the text of the first `# ` line, found without splitting the document """
+    if markdown.startswith("# "):
+        start = 2
+    else:
+        start = markdown.find("\n# ")
+        if start == -1:
+            raise Exception("No H1 header found in the markdown file.")
+        start += 3
+    end = markdown.find("\n", start)
+    return markdown[start:] if end == -1 else markdown[start:end]
+
+
+def copy_directory(src, dst, manifest=None, checksum=False, link="auto"):
+    """ sync static files into dst, copying only changed files and removing stale ones """
+    previous = manifest.static if manifest is not None else None
+    record, copied, removed = sync_directory(
+        src, dst, previous, checksum, link)
+    for s, d in copied:
+        log_event(logging.DEBUG, "static_copied",
+                  "Copied %s to %s", s, d, source=s, dest=d)
+    for d in removed:
+        log_event(logging.DEBUG, "static_removed", "Removed %s", d, dest=d)
+    if manifest is not None:
+        manifest.static = record
+    log_event(logging.INFO, "static_synced", "%d static files copied, %d up to date, %d removed",
+              len(copied), len(record) - len(copied), len(removed),
+              copied=len(copied), unchanged=len(record) - len(copied), removed=len(removed))
+
+
+def generate_page(from_path, template_path, dest_path, loader=None, profiler=None, cache=None):
+    """Render one page.
+
+    Returns (template name, {asset URL: fingerprinted URL} it links to,
+    [url, line] for every link and image it emits, whether the output's
+    bytes changed).
+    """
+    if loader is None:
+        loader = TemplateLoader(os.path.dirname(template_path))
+
+    with measure(profiler, from_path, "read"):
+        with open(from_path, 'r') as file:
+            markdown = file.read()
+
+    with measure(profiler, from_path, "template"):
+        try:
+            metadata, body = split_front_matter(markdown)
+        except ValueError as error:
+            raise ValueError(f"{from_path}: {error}")
+        first_line = markdown.count("\n", 0, len(markdown) - len(body)) + 1
+        markdown = body
+        template_name = metadata.get(
+            "template", os.path.basename(template_path))
+        template = loader.load(template_name)
+
+    with measure(profiler, from_path, "parse"):
+        html_node = markdown_to_html_node(markdown, cache)
+        title = metadata.get("title") or extract_title(markdown)
+
+    with measure(profiler, from_path, "render"):
+        written = stream_file(dest_path, lambda file: template.write(
+            file, {"Title": escape_text(title), "Content": html_node}))
+    return template_name, referenced_assets(markdown, loader.asset_urls), page_links(markdown, first_line), written
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    """ walk the content tree and return (source, dest) pairs for every markdown file """
+    pages = []
+    with os.scandir(dir_path_content) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.is_file() and entry.name.endswith('.md'):
+                dest_path = os.path.join(
+                    dest_dir_path, Path(entry.name).stem + '.html')
+                pages.append((entry.path, dest_path))
+            elif entry.is_dir():
+                pages.extend(collect_pages(
+                    entry.path, os.path.join(dest_dir_path, entry.name)))
+    return pages
+
+
+def page_dest_path(source_path, dir_path_content, dest_dir_path):
+    rel_path = os.path.relpath(source_path, dir_path_content)
+    return os.path.join(dest_dir_path, os.path.splitext(rel_path)[0] + '.html')
+
+
+_worker_template_path = None
+_worker_loader = None
+_worker_profiler = None
+_worker_cache = None
+
+
+def _init_worker(template_path, profile_allocations=None, cache_options=None, asset_urls=None, images=None):
+    global _worker_template_path, _worker_loader, _worker_profiler, _worker_cache
+    asset_urls = asset_urls or {}
+    images = images or {}
+    set_asset_urls(asset_urls, urls_digest([asset_urls, images]), images)
+    _worker_template_path = template_path
+    _worker_loader = TemplateLoader(os.path.dirname(template_path), asset_urls)
+    _worker_profiler = None
+    if profile_allocations is not None:
+        _worker_profiler = BuildProfiler(profile_allocations)
+    _worker_cache = None
+    if cache_options is not None:
+        _worker_cache = FragmentCache(**cache_options)
+
+
+def _generate_batch(batch):
+    return [(source_path, dest_path, *generate_page(source_path, _worker_template_path, dest_path,
+                                                    _worker_loader, _worker_profiler, _worker_cache))
+            for source_path, dest_path in batch]
+
+
+def _generate_remote_batch(batch):
+    results = _generate_batch(batch)
+    records = _worker_profiler.drain() if _worker_profiler is not None else None
+    cache_stats = None
+    if _worker_cache is not None:
+        _worker_cache.flush()
+        cache_stats = _worker_cache.drain_stats()
+    return results, records, cache_stats, drain_inline_stats()
+
+
+def generate_pages(pages, template_path, jobs=1, profiler=None, cache=None, asset_urls=None, images=None):
+    """ render (source, dest) pairs, yielding (source, dest, template, assets, links, written) batches once written """
+    global _worker_profiler, _worker_cache
+    if jobs <= 1 or len(pages) <= 1:
+        _init_worker(template_path, asset_urls=asset_urls, images=images)
+        _worker_profiler = profiler
+        _worker_cache = cache
+        try:
+            for page in pages:
+                yield _generate_batch([page])
+        finally:
+            if cache is not None:
+                cache.flush()
+        return
+
+    chunk_size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i:i + chunk_size]
+               for i in range(0, len(pages), chunk_size)]
+    profile_allocations = profiler.allocations if profiler is not None else None
+    cache_options = None
+    if cache is not None:
+        cache_options = {"path": cache.path, "memory_items": cache.memory_items}
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker,
+            initargs=(template_path, profile_allocations, cache_options, asset_urls, images)) as executor:
+        futures = [executor.submit(_generate_remote_batch, batch)
+                   for batch in batches]
+        for future in concurrent.futures.as_completed(futures):
+            results, records, cache_stats, inline_stats = future.result()
+            merge_inline_stats(inline_stats)
+            if records:
+                profiler.extend(records)
+            if cache_stats:
+                cache.stats.update(cache_stats)
+            yield results
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest=None, jobs=1, profiler=None,
+                             cache=None, index=None, drafts=False, asset_urls=None, images=None):
+    with measure(profiler, None, "collect"):
+        pages = collect_pages(dir_path_content, dest_dir_path)
+    if index is not None:
+        with measure(profiler, None, "index"):
+            index.scan(pages, dest_dir_path)
+        log_event(logging.DEBUG, "index_scanned", "Read %d page headers, %d from the saved index",
+                  index.scanned, len(pages) - index.scanned,
+                  scanned=index.scanned, reused=len(pages) - index.scanned)
+        if not drafts:
+            pages = [(source_path, dest_path) for source_path, dest_path in pages
+                     if not index.entries[source_path]["draft"]]
+    asset_urls = asset_urls or {}
+    images = images or {}
+    loader = TemplateLoader(os.path.dirname(template_path), asset_urls)
+    digests = {}
+
+    def template_digest(name):
+        if name not in digests:
+            try:
+                digests[name] = loader.load(name).digest
+            except (OSError, ValueError):
+                digests[name] = None
+        return digests[name]
+
+    with measure(profiler, None, "manifest"):
+        if manifest is not None:
+            work = [(source_path, dest_path) for source_path, dest_path in pages
+                    if manifest.page_changed(source_path, dest_path, template_digest, asset_urls, images)]
         else:
-            shutil.copy2(s, d)
-            print(f"Copied {s} to {d}")
+            work = pages
+
+    generated = 0
+    identical = 0
+    progress = Progress("Generating pages", len(work))
+    for batch in generate_pages(work, template_path, jobs, profiler, cache, asset_urls, images):
+        generated += len(batch)
+        progress.update(len(batch))
+        for source_path, dest_path, template_name, assets, links, written in batch:
+            identical += not written
+            log_event(logging.DEBUG, "page_generated", "Generated %s from %s using %s",
+                      dest_path, source_path, template_name,
+                      source=source_path, dest=dest_path, template=template_name)
+            if manifest is not None:
+                manifest.record_page(source_path, dest_path, template_name, template_digest(template_name),
+                                     assets, links, images)
+    progress.done()
+
+    removed = 0
+    if manifest is not None:
+        for dest_path in manifest.remove_stale_pages():
+            if os.path.exists(dest_path):
+                remove_file(dest_path, dest_dir_path)
+                log_event(logging.DEBUG, "page_removed",
+                          "Removed %s", dest_path, dest=dest_path)
+            removed += 1
 
+    log_event(logging.INFO, "pages_generated", "%d pages generated (%d byte-identical, not rewritten), "
+              "%d up to date, %d removed", generated, identical, len(pages) - generated, removed,
+              generated=generated, identical=identical, unchanged=len(pages) - generated, removed=removed)
 
-def generate_page(from_path, template_path, dest_path):
-    print(
-        f"Generating page from {from_path} to {dest_path} using {template_path}")
+    inline_stats = drain_inline_stats()
+    lookups = inline_stats["hits"] + inline_stats["misses"]
+    if lookups:
+        log_event(logging.INFO, "inline_memo", "Inline memo: %d hits, %d misses, %.0f%% hit rate",
+                  inline_stats["hits"], inline_stats["misses"], 100 * inline_stats["hits"] / lookups,
+                  hits=inline_stats["hits"], misses=inline_stats["misses"])
 
-    with open(from_path, 'r') as file:
-        markdown = file.read()
 
-    with open(template_path, 'r') as file:
-        template = file.read()
+def fingerprint_static(src, dst, manifest, link="auto"):
+    """ write content-hashed copies of static assets and return their URL map """
+    record, urls, written, removed = fingerprint_assets(
+        src, dst, manifest.assets, link)
+    manifest.assets = record
+    for path in written:
+        log_event(logging.DEBUG, "asset_fingerprinted",
+                  "Fingerprinted %s", path, dest=path)
+    for path in removed:
+        log_event(logging.DEBUG, "asset_removed", "Removed %s", path, dest=path)
+    log_event(logging.INFO, "assets_fingerprinted", "%d assets fingerprinted, %d written, %d removed",
+              len(urls), len(written), len(removed),
+              assets=len(urls), written=len(written), removed=len(removed))
+    return urls
 
-    html_node = markdown_to_html_node(markdown)
-    html = html_node.to_html()
 
-    title = extract_title(markdown)
-    print(f"Title: {title}")
+def process_static_images(src, dst, manifest, link="auto"):
+    """ encode resized WebP variants of static images and return their attributes by URL """
+    record, written, removed, failed = process_images(src, dst, manifest.assets, manifest.images, link=link)
+    manifest.images = record
+    for path in written:
+        log_event(logging.DEBUG, "image_variant_written", "Wrote %s", path, dest=path)
+    for path in removed:
+        log_event(logging.DEBUG, "image_variant_removed", "Removed %s", path, dest=path)
+    for rel_path in failed:
+        log_event(logging.WARNING, "image_unreadable", "Could not decode %s", rel_path, source=rel_path)
+    log_event(logging.INFO, "images_processed", "%d images with %d variants, %d written, %d removed",
+              len(record), sum(len(entry["variants"]) for entry in record.values()), len(written), len(removed),
+              images=len(record), written=len(written), removed=len(removed), failed=len(failed))
+    return image_attributes(record)
 
-    new_html = template.replace(
-        "{{ Title }}", title).replace("{{ Content }}", html)
-    # print(f"New HTML: {new_html}")
 
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+def generate_site_listings(index, template_path, dest_dir_path, manifest, per_page=default_per_page, drafts=False,
+                           force=False, asset_urls=None):
+    """ write archive, tag and section listings from the page index, skipping unchanged ones """
+    template = TemplateLoader(os.path.dirname(template_path), asset_urls).load(
+        os.path.basename(template_path))
+    record, written, removed = generate_listings(
+        index, template, dest_dir_path, manifest.listings, force, per_page, drafts)
+    manifest.listings = record
+    for dest_path in written:
+        log_event(logging.DEBUG, "listing_generated",
+                  "Generated listing %s", dest_path, dest=dest_path)
+    for dest_path in removed:
+        log_event(logging.DEBUG, "listing_removed",
+                  "Removed listing %s", dest_path, dest=dest_path)
+    log_event(logging.INFO, "listings_generated", "%d listing pages generated, %d up to date, %d removed",
+              len(written), len(record) - len(written), len(removed),
+              generated=len(written), unchanged=len(record) - len(written), removed=len(removed))
 
-    with open(dest_path, 'w') as file:
-        file.write(new_html)
-    print(f"Written to {dest_path}")
 
+def write_site_feeds(index, manifest, dest_dir_path, base_url, drafts=False):
+    """ stream sitemap.xml (sharded past 50k URLs), feed.xml and atom.xml from the page index """
+    listing_urls = [page_url(os.path.join(dest_dir_path, rel_path), dest_dir_path) for rel_path in manifest.listings]
+    count = write_sitemaps(site_urls(index, listing_urls, drafts), dest_dir_path, base_url)
+    dated = [entry for _, entry in index.by_date(drafts) if parse_date(entry["date"])]
+    home = [entry["title"] for entry in index.entries.values() if entry["url"] == "/"]
+    title = home[0] if home and home[0] else base_url
+    write_rss(dated, os.path.join(dest_dir_path, "feed.xml"), base_url, title)
+    newest = max((entry["mtime_ns"] for _, entry in index.published(drafts)), default=0)
+    write_atom(dated, os.path.join(dest_dir_path, "atom.xml"), base_url, title, updated=mtime_date(newest))
+    log_event(logging.INFO, "feeds_written", "Sitemap with %d URLs, feeds with %d entries",
+              count, min(len(dated), feed_size), urls=count, entries=min(len(dated), feed_size))
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
-    for entry in os.listdir(dir_path_content):
-        source_path = os.path.join(dir_path_content, entry)
-        if os.path.isfile(source_path) and source_path.endswith('.md'):
-            dest_path = os.path.join(
-                dest_dir_path, Path(source_path).stem + '.html')
-            generate_page(source_path, template_path, dest_path)
-        elif os.path.isdir(source_path):
-            new_dest_dir_path = os.path.join(dest_dir_path, entry)
-            os.makedirs(new_dest_dir_path, exist_ok=True)
-            generate_pages_recursive(
-                source_path, template_path, new_dest_dir_path)
+
+def precompress(dest_dir_path, min_size=default_min_size, jobs=None):
+    """ refresh .gz/.br siblings of the compressible outputs """
+    compressed, removed = compress_directory(dest_dir_path, min_size, jobs)
+    for path in compressed:
+        log_event(logging.DEBUG, "compressed", "Compressed %s", path, dest=path)
+    log_event(logging.INFO, "precompressed", "%d precompressed files written, %d removed",
+              len(compressed), len(removed), written=len(compressed), removed=len(removed))
+
+
+def check_links(manifest, dest_dir_path, extra_targets=()):
+    """Report links to pages or files the build did not produce and return how many there are.
+
+    The first `broken_link_warnings` are warnings; the rest are logged at
+    debug level, so a badly broken site does not flood the console. The
+    result is kept in the manifest: when nothing was recorded since the
+    last save, no page, listing or file changed and the stored result is
+    reported again without resolving a single link.
+    """
+    extra_targets = sorted(extra_targets)
+    stored = manifest.links
+    if not manifest.dirty and stored.get("extra") == extra_targets:
+        broken, checked = stored["broken"], stored["checked"]
+    else:
+        broken, checked = find_broken_links(manifest, dest_dir_path, extra_targets)
+        manifest.links = {"extra": extra_targets, "checked": checked, "broken": [list(link) for link in broken]}
+    for number, (source_path, line, url) in enumerate(broken):
+        level = logging.WARNING if number < broken_link_warnings else logging.DEBUG
+        log_event(level, "broken_link", "%s:%d: broken link %s",
+                  source_path, line, url, source=source_path, line=line, url=url)
+    if len(broken) > broken_link_warnings:
+        log_event(logging.WARNING, "broken_links_truncated", "%d more broken links (see --verbose or --log-json)",
+                  len(broken) - broken_link_warnings, more=len(broken) - broken_link_warnings)
+    log_event(logging.INFO, "links_checked", "%d links checked, %d broken",
+              checked, len(broken), checked=checked, broken=len(broken))
+    return len(broken)
+
+
+def stage_output(output):
+    """ bring the staging tree level with the live site before building into it """
+    linked, removed = output.prepare()
+    log_event(logging.DEBUG, "staging_prepared", "Staging %s: %d files linked from %s, %d removed",
+              output.staging, linked, output.live, removed, linked=linked, removed=removed)
+
+
+def publish_output(output):
+    """ swap the finished staging tree in as the live site """
+    if output.publish():
+        log_event(logging.INFO, "published", "Published %s", output.live, live=output.live, atomic=True)
+    else:
+        log_event(logging.WARNING, "published", "Published %s by renaming; renameat2 is unavailable, "
+                  "so the swap was not atomic", output.live, live=output.live, atomic=False)
+
+
+def report_fragment_cache(cache):
+    """ evict what no longer fits, then log this build's hit rate and the cache size """
+    evicted = cache.prune()
+    stats = cache.drain_stats()
+    hits = stats["memory_hits"] + stats["disk_hits"]
+    lookups = hits + stats["misses"]
+    entries, size = cache.usage()
+    log_event(logging.INFO, "fragment_cache",
+              "Fragment cache: %d hits (%d memory, %d disk), %d misses, %.0f%% hit rate; "
+              "%d fragments, %.1f MB, %d evicted",
+              hits, stats["memory_hits"], stats["disk_hits"], stats["misses"],
+              100 * hits / lookups if lookups else 0, entries, size / 1024 / 1024, evicted,
+              memory_hits=stats["memory_hits"], disk_hits=stats["disk_hits"], misses=stats["misses"],
+              fragments=entries, bytes=size, evicted=evicted)
+
+
+def is_under(path, root):
+    return path == root or path.startswith(root + os.sep)
+
+
+def watch_site(dir_path_content, template_path, dest_dir_path, static_dir, manifest,
+               checksum=False, link="auto", jobs=1, polling=False, cache=None, index=None, drafts=False,
+               per_page=default_per_page, base_url=None, compress_min_size=None, asset_urls=None, images=None,
+               output=None):
+    """Rebuild only what a change affects, until interrupted.
+
+    Each page's template chain and internal links are kept in a
+    DependencyGraph: a template edit rebuilds the pages that use it, and
+    adding or removing a page also rebuilds the pages that link to it.
+
+    With a StagedOutput, dest_dir_path is its staging tree: each rebuild
+    is swapped in when it completes, and the staging tree is then brought
+    level again right away. A failed rebuild is not published but stays
+    staged, in step with the manifest, and goes out with the next one.
+    """
+    if output is not None:
+        stage_output(output)
+    dir_path_content = os.path.normpath(dir_path_content)
+    static_dir = os.path.normpath(static_dir)
+    template_dir = os.path.normpath(os.path.dirname(template_path))
+    default_template = os.path.basename(template_path)
+    asset_urls = asset_urls or {}
+    images = images or {}
+    loader = TemplateLoader(template_dir, asset_urls)
+    graph = DependencyGraph()
+    pages = dict(collect_pages(dir_path_content, dest_dir_path))
+
+    def track(source_path):
+        try:
+            graph.update_page(source_path, *page_dependencies(
+                source_path, default_template, loader, dir_path_content))
+        except (OSError, ValueError) as error:
+            log_event(logging.WARNING, "dependency_error", "Could not read dependencies of %s: %s",
+                      source_path, error, source=source_path, error=str(error))
+
+    def add_page(source_path, work):
+        if source_path not in pages:
+            pages[source_path] = page_dest_path(
+                source_path, dir_path_content, dest_dir_path)
+            work |= graph.pages_linking_to(source_path)
+        work.add(source_path)
+
+    def remove_output(source_path, dest_path):
+        if os.path.exists(dest_path):
+            remove_file(dest_path, dest_dir_path)
+            log_event(logging.DEBUG, "page_removed",
+                      "Removed %s", dest_path, dest=dest_path)
+        manifest.remove_page(source_path)
+
+    def remove_page(source_path, work):
+        remove_output(source_path, pages.pop(source_path))
+        if index is not None:
+            index.remove(source_path)
+        graph.remove_page(source_path)
+        work |= graph.pages_linking_to(source_path)
+
+    def template_digest(name):
+        try:
+            return loader.load(name).digest
+        except (OSError, ValueError):
+            return None
+
+    for source_path in pages:
+        track(source_path)
+
+    watcher = create_watcher(
+        [dir_path_content, static_dir, template_dir], polling)
+    log_event(logging.INFO, "watch_started", "Watching %s, %s and %s for changes (%s)...",
+              dir_path_content, static_dir, template_dir, type(watcher).__name__)
+    try:
+        while True:
+            changed, detected = wait_for_changes(watcher)
+            changed = {os.path.normpath(path) for path in changed}
+            start = time.monotonic()
+            work = set()
+            static_changed = False
+            try:
+                for path in changed:
+                    if is_under(path, static_dir):
+                        static_changed = True
+                    elif path == template_dir:
+                        # the watcher lost events (queue overflow) and reports the whole directory
+                        work |= set(pages)
+                    elif is_under(path, template_dir):
+                        work |= graph.pages_using_template(path)
+                    elif not is_under(path, dir_path_content):
+                        continue
+                    elif os.path.isdir(path):
+                        dest_dir = os.path.join(
+                            dest_dir_path, os.path.relpath(path, dir_path_content))
+                        for source_path, _ in collect_pages(path, dest_dir):
+                            add_page(source_path, work)
+                    elif os.path.isfile(path):
+                        if path.endswith('.md'):
+                            add_page(path, work)
+                    else:
+                        for source_path in [source_path for source_path in pages if is_under(source_path, path)]:
+                            remove_page(source_path, work)
+
+                if static_changed:
+                    copy_directory(static_dir, dest_dir_path,
+                                   manifest, checksum, link)
+                    urls = fingerprint_static(
+                        static_dir, dest_dir_path, manifest, link)
+                    variants = process_static_images(static_dir, dest_dir_path, manifest, link)
+                    if urls != asset_urls or variants != images:
+                        asset_urls, images = urls, variants
+                        loader.set_asset_urls(asset_urls)
+                        work |= {source_path for source_path, dest_path in pages.items()
+                                 if manifest.page_changed(source_path, dest_path, template_digest, asset_urls,
+                                                          images)}
+                batch_work = [(source_path, pages[source_path])
+                              for source_path in sorted(work) if source_path in pages]
+                if index is not None:
+                    for source_path, dest_path in batch_work:
+                        index.update(source_path, dest_path, dest_dir_path)
+                    if not drafts:
+                        for source_path, dest_path in batch_work:
+                            if index.entries[source_path]["draft"]:
+                                remove_output(source_path, dest_path)
+                        batch_work = [(source_path, dest_path) for source_path, dest_path in batch_work
+                                      if not index.entries[source_path]["draft"]]
+                for batch in generate_pages(batch_work, template_path, jobs, cache=cache, asset_urls=asset_urls,
+                                            images=images):
+                    for source_path, dest_path, template_name, assets, links, _ in batch:
+                        log_event(logging.DEBUG, "page_generated", "Generated %s from %s using %s",
+                                  dest_path, source_path, template_name,
+                                  source=source_path, dest=dest_path, template=template_name)
+                        manifest.record_page(source_path, dest_path, template_name,
+                                             template_digest(template_name), assets, links, images)
+                        track(source_path)
+                if index is not None:
+                    generate_site_listings(
+                        index, template_path, dest_dir_path, manifest, per_page, drafts, asset_urls=asset_urls)
+                    if base_url:
+                        write_site_feeds(index, manifest, dest_dir_path, base_url, drafts)
+                    index.save()
+                check_links(manifest, dest_dir_path, feed_files if base_url else ())
+                if compress_min_size is not None:
+                    precompress(dest_dir_path, compress_min_size)
+                write_etags(dest_dir_path)
+                if output is not None:
+                    publish_output(output)
+                manifest.save()
+                if output is not None:
+                    stage_output(output)
+                if cache is not None:
+                    cache.prune()
+            except Exception as error:
+                log_event(logging.ERROR, "rebuild_failed",
+                          "Rebuild failed: %s", error, error=str(error))
+                continue
+
+            now = time.monotonic()
+            mtimes = [os.stat(path).st_mtime for path in changed if os.path.exists(path)]
+            since_save = time.time() - max(mtimes) if mtimes else now - detected
+            log_event(logging.INFO, "rebuild", "Rebuilt %d pages in %.0f ms, %.0f ms after save",
+                      len(batch_work), (now - start) * 1000, since_save * 1000,
+                      pages=len(batch_work), rebuild_ms=(now - start) * 1000, latency_ms=since_save * 1000)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
 
 
 def main():
-    copy_directory("static", "public")
-    generate_pages_recursive("content", "templates/base.html", "public")
+    parser = argparse.ArgumentParser(description="Static Site Generator")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and regenerate every page")
+    parser.add_argument("--checksum", action="store_true",
+                        help="compare static files by content hash instead of size and mtime")
+    parser.add_argument("--link", choices=("auto", "copy", "hardlink"), default="auto",
+                        help="how to copy static files: reflink when possible, plain copy, or hard links")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, watch content/, static/ and templates/ and rebuild what changes")
+    parser.add_argument("--poll", action="store_true",
+                        help="watch by polling instead of inotify")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="render pages in N processes (0 = one per CPU)")
+    parser.add_argument("--no-fragment-cache", action="store_true",
+                        help="render every block instead of reusing HTML cached from earlier builds")
+    parser.add_argument("--fragment-cache-mb", type=float, default=default_max_bytes / 1024 / 1024,
+                        help="evict least recently used fragments beyond this size (default: %(default)d)")
+    parser.add_argument("--drafts", action="store_true",
+                        help="also build pages marked `draft: true` in their front matter")
+    parser.add_argument("--per-page", type=int, default=default_per_page,
+                        help="entries per archive, tag and section listing page (default: %(default)d)")
+    parser.add_argument("--base-url", metavar="URL",
+                        help="absolute site URL; when set, sitemap.xml, feed.xml and atom.xml are written")
+    parser.add_argument("--strict-links", action="store_true",
+                        help="exit with status 1 when a page links to something the build did not produce")
+    parser.add_argument("--highlight-style", default=default_style, metavar="STYLE",
+                        help="Pygments style for public/highlight.css")
+    parser.add_argument("--no-staging", action="store_true",
+                        help="write straight into public/ instead of building aside and swapping it in")
+    parser.add_argument("--compress", action="store_true",
+                        help="write .gz (and .br, with the brotli module) next to HTML, CSS, JS, XML and JSON outputs")
+    parser.add_argument("--compress-min-size", type=int, default=default_min_size, metavar="BYTES",
+                        help="do not precompress files smaller than this (default: %(default)d)")
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="log every copied, generated and removed file")
+    parser.add_argument("--log-json", metavar="FILE",
+                        help="write every build event to FILE as JSON lines")
+    parser.add_argument("--profile", action="store_true",
+                        help="time and count allocations for every stage and page, then print a summary")
+    parser.add_argument("--profile-trace", metavar="FILE",
+                        help="with --profile, also write a Chrome trace (loadable in speedscope)")
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    configure_logging(args.verbose, args.log_json)
+    try:
+        profiler = BuildProfiler() if args.profile else None
+        start = time.perf_counter()
+
+        output = None
+        dest = "public"
+        if not args.no_staging:
+            output = StagedOutput(dest)
+            with measure(profiler, None, "stage"):
+                stage_output(output)
+            dest = output.staging
+
+        manifest = BuildManifest(dest_dir=dest)
+        if args.force:
+            manifest.outdated = True
+
+        with measure(profiler, None, "sync_static"):
+            copy_directory("static", dest, manifest, args.checksum, args.link)
+            asset_urls = fingerprint_static("static", dest, manifest, args.link)
+        with measure(profiler, None, "images"):
+            images = process_static_images("static", dest, manifest, args.link)
+        if write_stylesheet(dest, args.highlight_style):
+            log_event(logging.INFO, "stylesheet_written", "Wrote highlight.css (%s style)",
+                      args.highlight_style, style=args.highlight_style)
+        cache = None
+        if not args.no_fragment_cache:
+            cache = FragmentCache(
+                max_bytes=int(args.fragment_cache_mb * 1024 * 1024))
+        index = PageIndex()
+        generate_pages_recursive(
+            "content", "templates/base.html", dest, manifest, jobs, profiler, cache, index, args.drafts,
+            asset_urls, images)
+        with measure(profiler, None, "listings"):
+            generate_site_listings(index, "templates/base.html", dest, manifest,
+                                   args.per_page, args.drafts, manifest.outdated, asset_urls)
+        if args.base_url:
+            with measure(profiler, None, "feeds"):
+                write_site_feeds(index, manifest, dest, args.base_url, args.drafts)
+        with measure(profiler, None, "links"):
+            broken = check_links(manifest, dest, feed_files if args.base_url else ())
+        if args.compress:
+            with measure(profiler, None, "compress"):
+                precompress(dest, args.compress_min_size)
+        with measure(profiler, None, "save"):
+            write_etags(dest)
+            if output is not None:
+                publish_output(output)
+            # after publishing: a manifest must never describe outputs that did not go live
+            manifest.save()
+            index.save()
+            if cache is not None:
+                report_fragment_cache(cache)
+        elapsed = time.perf_counter() - start
+        log_event(logging.INFO, "build_finished", "Built in %.0f ms",
+                  elapsed * 1000, seconds=elapsed)
+
+        if profiler is not None:
+            log_event(logging.INFO, "profile", "%s",
+                      profiler.summary(elapsed))
+            if args.profile_trace:
+                profiler.write_trace(args.profile_trace)
+                log_event(logging.INFO, "profile_trace", "Trace written to %s",
+                          args.profile_trace, path=args.profile_trace)
+
+        if broken and args.strict_links:
+            raise SystemExit(1)
+        if args.watch:
+            watch_site("content", "templates/base.html", dest, "static", manifest,
+                       args.checksum, args.link, jobs, args.poll, cache, index, args.drafts, args.per_page,
+                       args.base_url, args.compress_min_size if args.compress else None, asset_urls,
+                       images, output)
+    finally:
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import json
+import os
+
+
+default_manifest_path = os.path.join(".cache", "manifest.json")
+
+
+@functools.lru_cache(maxsize=None)
+def generator_version():
+    """ hash of the generator sources, so any code change invalidates the manifest """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith(".py") and not name.startswith("test_"):
+            digest.update(name.encode())
+            with open(os.path.join(src_dir, name), "rb") as file:
+                digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_images(assets, images):
+    """ the (width, height, srcset) of each image among a page's assets that has variants, as stored """
+    return {url: list(images[url]) for url in assets if url in images}
+
+
+def _tracked_record(name):
+    """ a BuildManifest attribute that marks the manifest dirty when a different record is assigned """
+    def get(self):
+        return self._records[name]
+
+    def set(self, record):
+        if record != self._records[name]:
+            self._records[name] = record
+            self.dirty = True
+    return property(get, set)
+
+
+class BuildManifest:
+    """Records the inputs each generated page was built from.
+
+    A page is up to date when its source, its template and the generator
+    version all match the previous build and its output still exists. The
+    source is only hashed when its size or mtime changed, so a no-op build
+    costs one stat per page. Assigning static, listings, assets, images or
+    links records only marks the manifest dirty when they differ, and save()
+    writes nothing unless something is. Outputs are recorded relative to
+    `dest_dir`, so a build into a staging tree and one straight into the
+    site share the manifest.
+    """
+
+    def __init__(self, path=default_manifest_path, version=None, dest_dir=None):
+        self.path = path
+        self.version = version or generator_version()
+        self.dest_dir = dest_dir
+        self.pages = {}
+        self._records = {"static": {}, "listings": {}, "assets": {}, "images": {}, "links": {}}
+        self.seen = set()
+        self.outdated = True
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+            self.pages = data.get("pages", {})
+            for name in self._records:
+                self._records[name] = data.get(name, {})
+            self.outdated = data.get("version") != self.version
+        self.dirty = self.outdated
+
+    def output_path(self, recorded):
+        """ the path of a recorded output under dest_dir """
+        return recorded if self.dest_dir is None else os.path.join(self.dest_dir, recorded)
+
+    def _record_path(self, dest_path):
+        return dest_path if self.dest_dir is None else os.path.relpath(dest_path, self.dest_dir)
+
+    static = _tracked_record("static")
+    listings = _tracked_record("listings")
+    assets = _tracked_record("assets")
+    images = _tracked_record("images")
+    links = _tracked_record("links")
+
+    def page_changed(self, source_path, dest_path, template_digest, asset_urls=None, images=None):
+        """Return True if the page has to be rendered again.
+
+        `template_digest` maps a template name to the current hash of its
+        inheritance chain; the name comes from the previous build, which is
+        still right as long as the source itself is unchanged. With
+        `asset_urls`, a page is also stale when an asset it links to got a
+        new fingerprinted URL; with `images`, when the variants of an image
+        it shows changed, appeared or went away.
+        """
+        self.seen.add(source_path)
+        entry = self.pages.get(source_path)
+        if self.outdated or entry is None or self.output_path(entry["dest"]) != dest_path:
+            return True
+        digest = template_digest(entry["template"])
+        if digest is None or digest != entry["template_hash"]:
+            return True
+        if asset_urls is not None and any(
+                asset_urls.get(url) != target for url, target in entry.get("assets", {}).items()):
+            return True
+        if images is not None and page_images(entry.get("assets", {}), images) != entry.get("images", {}):
+            return True
+        if not os.path.exists(dest_path):
+            return True
+        stat = os.stat(source_path)
+        if entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return False
+        if entry["hash"] != hash_file(source_path):
+            return True
+        entry["mtime_ns"] = stat.st_mtime_ns
+        entry["size"] = stat.st_size
+        self.dirty = True
+        return False
+
+    def record_page(self, source_path, dest_path, template_name, template_digest, assets=None, links=None,
+                    images=None):
+        self.seen.add(source_path)
+        stat = os.stat(source_path)
+        entry = {
+            "dest": self._record_path(dest_path),
+            "template": template_name,
+            "template_hash": template_digest,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "hash": hash_file(source_path),
+            "assets": assets or {},
+            "images": page_images(assets or {}, images or {}),
+            "links": links or [],
+        }
+        if self.pages.get(source_path) != entry:
+            self.pages[source_path] = entry
+            self.dirty = True
+
+    def remove_page(self, source_path):
+        if self.pages.pop(source_path, None) is not None:
+            self.dirty = True
+
+    def remove_stale_pages(self):
+        """ forget pages whose sources are gone and return their outputs """
+        removed = []
+        for source_path in list(self.pages):
+            if source_path not in self.seen:
+                removed.append(self.output_path(self.pages.pop(source_path)["dest"]))
+                self.dirty = True
+        return removed
+
+    def save(self):
+        """ write the manifest if anything changed; json.dumps, unlike json.dump, uses the C encoder """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(json.dumps({"version": self.version, "pages": self.pages, **self._records}))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,199 @@
+import ctypes
+import errno
+import os
+
+from sync import copy_file, remove_file, walk_files
+
+
+at_fdcwd = -100
+rename_exchange = 2
+
+_directories = set()
+_renameat2 = None
+
+
+def makedirs(path):
+    """ os.makedirs, skipping directories this process has already created """
+    if path not in _directories:
+        os.makedirs(path, exist_ok=True)
+        _directories.add(path)
+
+
+def _open_tmp(path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        return open(tmp_path, "wb")
+    except FileNotFoundError:
+        # remove_file prunes directories that became empty, so the cache can be stale
+        directory = os.path.dirname(path)
+        _directories.discard(directory)
+        makedirs(directory)
+        return open(tmp_path, "wb")
+
+
+class _ComparingWriter:
+    """A text sink that only starts a new file once its bytes differ from the old one.
+
+    Each write is encoded and compared with the old file's next bytes;
+    while they match, nothing is written. At the first difference the
+    matching prefix is copied from the old file into a temporary file,
+    which then takes everything that follows.
+    """
+
+    __slots__ = ("path", "old", "file", "matched")
+
+    def __init__(self, path, old):
+        self.path = path
+        self.old = old
+        self.file = None
+        self.matched = 0
+
+    def write(self, text):
+        data = text.encode()
+        if self.file is None:
+            if self.old is not None and self.old.read(len(data)) == data:
+                self.matched += len(data)
+                return
+            self.diverge()
+        self.file.write(data)
+
+    def diverge(self):
+        self.file = _open_tmp(self.path)
+        if self.matched:
+            self.old.seek(0)
+            remaining = self.matched
+            while remaining:
+                chunk = self.old.read(min(remaining, 1 << 20))
+                self.file.write(chunk)
+                remaining -= len(chunk)
+
+    def finish(self):
+        """ rename the new file over the old one and return True, or return False if nothing differed """
+        if self.file is None:
+            if self.old is not None and not self.old.read(1):
+                return False
+            self.diverge()
+        self.file.close()
+        os.replace(self.file.name, self.path)
+        return True
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            os.remove(self.file.name)
+
+
+def stream_file(path, fill):
+    """Stream a file into path: fill(file) writes text to a file-like object.
+
+    Pieces are compared with the current file as they are written, so a
+    page is never held in memory whole and an unchanged one is never
+    written at all: path keeps its mtime, so rsync and CDN uploads see no
+    difference. A changed file goes to a temporary file that is renamed
+    over path; files are never rewritten in place, because a staging tree
+    shares inodes with the live one. Returns True when the file was
+    written.
+    """
+    makedirs(os.path.dirname(path))
+    try:
+        old = open(path, "rb")
+    except FileNotFoundError:
+        old = None
+    writer = _ComparingWriter(path, old)
+    try:
+        fill(writer)
+        return writer.finish()
+    except BaseException:
+        writer.discard()
+        raise
+    finally:
+        if old is not None:
+            old.close()
+
+
+def write_file(path, text):
+    """ stream_file for text that is already in memory """
+    return stream_file(path, lambda file: file.write(text))
+
+
+def exchange(a, b):
+    """Atomically swap two paths with renameat2(RENAME_EXCHANGE).
+
+    Returns False when the C library or the filesystem does not support
+    it, so the caller can fall back to plain renames.
+    """
+    global _renameat2
+    if _renameat2 is None:
+        try:
+            _renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+        except (AttributeError, OSError):
+            _renameat2 = False
+    if not _renameat2:
+        return False
+    if _renameat2(at_fdcwd, os.fsencode(a), at_fdcwd, os.fsencode(b), rename_exchange) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):
+        return False
+    raise OSError(error, os.strerror(error), a, None, b)
+
+
+def staging_path(live):
+    """ public -> .public.staging, next to it so both are on one filesystem """
+    live = os.path.normpath(live)
+    return os.path.join(os.path.dirname(live), f".{os.path.basename(live)}.staging")
+
+
+class StagedOutput:
+    """A staging tree the build writes into, swapped with `live` once it is complete.
+
+    The server keeps serving the previous build until then. After a swap
+    the staging path holds the previous tree; prepare() brings it level
+    with the live one again by hard-linking the files whose inode differs
+    and deleting those that are gone, which touches only what the last
+    build changed.
+    """
+
+    def __init__(self, live, staging=None):
+        self.live = live
+        self.staging = staging or staging_path(live)
+
+    def prepare(self):
+        """ mirror live into staging; returns (files linked, files removed) """
+        _directories.clear()
+        live_files = dict(walk_files(self.live)) if os.path.isdir(self.live) else {}
+        staging_files = dict(walk_files(self.staging)) if os.path.isdir(self.staging) else {}
+        linked = 0
+        for rel_path, entry in live_files.items():
+            other = staging_files.get(rel_path)
+            if other is not None and other.inode() == entry.inode():
+                continue
+            dst_path = os.path.join(self.staging, rel_path)
+            makedirs(os.path.dirname(dst_path))
+            copy_file(entry.path, dst_path, "hardlink")
+            linked += 1
+        removed = 0
+        for rel_path, entry in staging_files.items():
+            if rel_path not in live_files:
+                remove_file(entry.path, self.staging)
+                removed += 1
+        makedirs(self.staging)
+        return linked, removed
+
+    def publish(self):
+        """Make the staging tree live. Returns True when the swap was atomic.
+
+        Without renameat2 the live tree is renamed aside first, so for a
+        moment there is no live tree at all.
+        """
+        _directories.clear()
+        if not os.path.exists(self.live):
+            os.rename(self.staging, self.live)
+            return True
+        if exchange(self.staging, self.live):
+            return True
+        previous = self.staging + ".previous"
+        os.rename(self.live, previous)
+        os.rename(self.staging, self.live)
+        os.rename(previous, self.staging)
+        return False
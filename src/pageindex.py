@@ -0,0 +1,112 @@
+import json
+import os
+
+from frontmatter import read_front_matter
+from manifest import generator_version
+
+
+default_index_path = os.path.join(".cache", "pages.json")
+
+
+def page_url(dest_path, dest_dir_path):
+    """ site-absolute URL of a generated page; index.html maps to its directory """
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[:-len("index.html")]
+    return "/" + rel_path
+
+
+class PageIndex:
+    """Site-wide metadata for every page, built from headers alone.
+
+    scan() reads only the front matter (and, failing a `title`, the first
+    heading) of pages whose size or mtime changed since the last build;
+    everything else is taken from the copy saved in .cache. Listing, tag
+    and feed pages query the index instead of opening the sources.
+    """
+
+    def __init__(self, path=default_index_path, version=None):
+        self.path = path
+        self.version = version or generator_version()
+        self.entries = {}
+        self.scanned = 0
+        self.dirty = True
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+            if data.get("version") == self.version:
+                self.entries = data.get("pages", {})
+                self.dirty = False
+
+    def update(self, source_path, dest_path, dest_dir_path, stat=None):
+        stat = stat or os.stat(source_path)
+        metadata = read_front_matter(source_path)
+        entry = {
+            "dest": os.path.relpath(dest_path, dest_dir_path),
+            "url": page_url(dest_path, dest_dir_path),
+            "title": metadata.get("title"),
+            "date": metadata.get("date"),
+            "tags": metadata.get("tags") or [],
+            "draft": metadata.get("draft", False),
+            "template": metadata.get("template"),
+            "summary": metadata.get("summary") or metadata.get("description"),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+        if self.entries.get(source_path) != entry:
+            self.entries[source_path] = entry
+            self.dirty = True
+        self.scanned += 1
+        return entry
+
+    def remove(self, source_path):
+        if self.entries.pop(source_path, None) is not None:
+            self.dirty = True
+
+    def scan(self, pages, dest_dir_path):
+        """ bring the index in line with (source, dest) pairs, reading only changed headers """
+        self.scanned = 0
+        current = set()
+        for source_path, dest_path in pages:
+            current.add(source_path)
+            stat = os.stat(source_path)
+            entry = self.entries.get(source_path)
+            if (entry is None or os.path.join(dest_dir_path, entry["dest"]) != dest_path or entry["mtime_ns"] != stat.st_mtime_ns
+                    or entry["size"] != stat.st_size):
+                self.update(source_path, dest_path, dest_dir_path, stat)
+        for source_path in list(self.entries):
+            if source_path not in current:
+                del self.entries[source_path]
+                self.dirty = True
+
+    def published(self, drafts=False):
+        """ (source, entry) pairs, drafts left out unless asked for """
+        return [(source_path, entry) for source_path, entry in self.entries.items()
+                if drafts or not entry["draft"]]
+
+    def by_date(self, drafts=False):
+        """ published pages, newest first; undated pages sort last """
+        pages = sorted(self.published(drafts))
+        pages.sort(key=lambda item: (item[1]["date"] is not None, item[1]["date"] or ""), reverse=True)
+        return pages
+
+    def tags(self, drafts=False):
+        """ tag -> published pages carrying it, newest first """
+        tags = {}
+        for source_path, entry in self.by_date(drafts):
+            for tag in entry["tags"]:
+                tags.setdefault(tag, []).append((source_path, entry))
+        return tags
+
+    def save(self):
+        """ write the index if any entry changed since it was loaded """
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(json.dumps({"version": self.version, "pages": self.entries}))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,130 @@
+import concurrent.futures
+import os
+import shutil
+
+from manifest import hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl number for FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+_reflink_supported = fcntl is not None
+
+
+def walk_files(src, prefix=""):
+    """ yield (relative path, DirEntry) for every file below src """
+    with os.scandir(src) as entries:
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir():
+                yield from walk_files(entry.path, rel_path + "/")
+            elif entry.is_file():
+                yield rel_path, entry
+
+
+def reflink(src, dst):
+    with open(src, "rb") as source, open(dst, "wb") as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, source.fileno())
+
+
+def copy_file(src, dst, link="auto"):
+    """Copy src over dst through a temporary file.
+
+    `link` is "copy", "auto" (reflink when the filesystem supports it) or
+    "hardlink". dst is always replaced rather than written in place, so an
+    earlier hard link never lets us modify the source file.
+    """
+    global _reflink_supported
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    try:
+        if link == "hardlink":
+            try:
+                os.link(src, tmp_path)
+            except OSError:
+                shutil.copy2(src, tmp_path)
+        elif link == "auto" and _reflink_supported:
+            try:
+                reflink(src, tmp_path)
+                shutil.copystat(src, tmp_path)
+            except OSError:
+                _reflink_supported = False
+                shutil.copy2(src, tmp_path)
+        else:
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_file(path, root):
+    """ remove path, then any directories it leaves empty up to (not including) root """
+    os.remove(path)
+    root = os.path.abspath(root)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent != root and parent.startswith(root + os.sep):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def file_changed(src_stat, src_path, dst_path, checksum):
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return True
+    if checksum:
+        return hash_file(src_path) != hash_file(dst_path)
+    return src_stat.st_mtime_ns != dst_stat.st_mtime_ns
+
+
+def sync_directory(src, dst, previous=None, checksum=False, link="auto", jobs=None):
+    """Make dst mirror the files of src, touching only what changed.
+
+    Files are compared by size and mtime, or by content hash when
+    `checksum` is set, and changed ones are copied in a thread pool.
+    `previous` is the record returned by the last sync; files listed there
+    that no longer exist in src are deleted from dst. Other files in dst,
+    such as generated pages, are left alone.
+
+    Returns (record, copied paths, removed paths).
+    """
+    record = {}
+    work = []
+    created_dirs = set()
+    for rel_path, entry in walk_files(src):
+        src_stat = entry.stat()
+        record[rel_path] = [src_stat.st_size, src_stat.st_mtime_ns]
+        dst_path = os.path.join(dst, rel_path)
+        if file_changed(src_stat, entry.path, dst_path, checksum):
+            dst_dir = os.path.dirname(dst_path)
+            if dst_dir not in created_dirs:
+                os.makedirs(dst_dir, exist_ok=True)
+                created_dirs.add(dst_dir)
+            work.append((entry.path, dst_path))
+
+    copied = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(copy_file, src_path, dst_path, link): (src_path, dst_path)
+                   for src_path, dst_path in work}
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            copied.append(futures[future])
+
+    removed = []
+    for rel_path in previous or ():
+        if rel_path not in record:
+            dst_path = os.path.join(dst, rel_path)
+            if os.path.exists(dst_path):
+                remove_file(dst_path, dst)
+                removed.append(dst_path)
+    return record, copied, removed
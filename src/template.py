@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+
+from assets import rewrite_references
+
+
+token_pattern = re.compile(
+    r"\{\{\s*(?P<slot>\w+)\s*\}\}|\{%\s*(?P<tag>\w+)(?:\s+(?P<arg>.*?))?\s*%\}")
+
+
+class Template:
+    """A template compiled to alternating literal chunks and slot names.
+
+    `chunks` always has one more entry than `slots`; rendering interleaves
+    them, so filling a page is a single join with no scanning.
+    """
+
+    def __init__(self, path, chunks, slots, dependencies, digest):
+        self.path = path
+        self.chunks = chunks
+        self.slots = slots
+        self.dependencies = dependencies
+        self.digest = digest
+
+    def render(self, context):
+        parts = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            value = context.get(slot)
+            if value is None:
+                parts.append(f"{{{{ {slot} }}}}")
+            elif hasattr(value, "to_html"):
+                parts.append(value.to_html())
+            else:
+                parts.append(value)
+            parts.append(chunk)
+        return "".join(parts)
+
+    def write(self, file, context):
+        """ like render, but streams into a file; HTML nodes are written with write_html """
+        file.write(self.chunks[0])
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            value = context.get(slot)
+            if value is None:
+                file.write(f"{{{{ {slot} }}}}")
+            elif hasattr(value, "write_html"):
+                value.write_html(file)
+            else:
+                file.write(value)
+            file.write(chunk)
+
+    def __repr__(self):
+        return f"Template({self.path}, slots: {self.slots})"
+
+
+def parse_template(source, path):
+    """Parse template source into (extends, nodes).
+
+    Nodes are literal strings, ("slot", name) and ("block", name, nodes).
+    """
+    extends = None
+    root = []
+    stack = [(None, root)]
+    position = 0
+    for match in token_pattern.finditer(source):
+        if match.start() > position:
+            stack[-1][1].append(source[position:match.start()])
+        position = match.end()
+
+        if match.group("slot"):
+            stack[-1][1].append(("slot", match.group("slot")))
+            continue
+
+        tag, arg = match.group("tag"), (match.group("arg") or "").strip()
+        if tag == "extends":
+            extends = arg.strip("\"'")
+        elif tag == "block":
+            children = []
+            stack[-1][1].append(("block", arg, children))
+            stack.append((arg, children))
+        elif tag == "endblock":
+            if len(stack) == 1:
+                raise ValueError(f"{path}: endblock without block")
+            stack.pop()
+        else:
+            raise ValueError(f"{path}: unknown template tag '{tag}'")
+    if len(stack) > 1:
+        raise ValueError(f"{path}: block '{stack[-1][0]}' is never closed")
+    if position < len(source):
+        root.append(source[position:])
+    return extends, root
+
+
+def collect_blocks(nodes, blocks):
+    for node in nodes:
+        if isinstance(node, tuple) and node[0] == "block":
+            blocks.setdefault(node[1], node[2])
+            collect_blocks(node[2], blocks)
+    return blocks
+
+
+def flatten(nodes, overrides, chunks, slots):
+    for node in nodes:
+        if isinstance(node, str):
+            chunks[-1] += node
+        elif node[0] == "slot":
+            slots.append(node[1])
+            chunks.append("")
+        else:
+            flatten(overrides.get(node[1], node[2]), overrides, chunks, slots)
+
+
+class TemplateLoader:
+    """Loads templates from a directory and caches their compiled form.
+
+    A cached template is reused until the mtime of any file in its
+    inheritance chain changes, so each template is read and parsed once per
+    process no matter how many pages use it. src and href attributes found
+    in `asset_urls` are rewritten to fingerprinted URLs, which then count
+    towards the template's digest.
+    """
+
+    def __init__(self, directory, asset_urls=None):
+        self.directory = directory
+        self.asset_urls = asset_urls or {}
+        self.parsed = {}
+        self.compiled = {}
+
+    def set_asset_urls(self, asset_urls):
+        if asset_urls != self.asset_urls:
+            self.asset_urls = asset_urls
+            self.compiled.clear()
+
+    def resolve(self, name):
+        return os.path.join(self.directory, name)
+
+    def parse(self, path):
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self.parsed.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached
+        with open(path, "r") as file:
+            source = file.read()
+        extends, nodes = parse_template(source, path)
+        cached = (mtime_ns, extends, nodes, source)
+        self.parsed[path] = cached
+        return cached
+
+    def load(self, name):
+        path = self.resolve(name)
+        template = self.compiled.get(path)
+        if template is not None and all(
+                os.stat(dep).st_mtime_ns == mtime_ns for dep, mtime_ns in template.dependencies):
+            return template
+
+        overrides = {}
+        dependencies = []
+        digest = hashlib.sha256()
+        current = path
+        while True:
+            if any(dep == current for dep, _ in dependencies):
+                raise ValueError(f"{path}: template inheritance loop at {current}")
+            mtime_ns, extends, nodes, source = self.parse(current)
+            dependencies.append((current, mtime_ns))
+            digest.update(source.encode())
+            if extends is None:
+                break
+            overrides = collect_blocks(nodes, dict(overrides))
+            current = self.resolve(extends)
+
+        chunks, slots = [""], []
+        flatten(nodes, overrides, chunks, slots)
+        if self.asset_urls:
+            rewritten = [rewrite_references(chunk, self.asset_urls) for chunk in chunks]
+            if rewritten != chunks:
+                digest.update("\0".join(rewritten).encode())
+                chunks = rewritten
+        template = Template(path, chunks, slots,
+                            dependencies, digest.hexdigest())
+        self.compiled[path] = template
+        return template
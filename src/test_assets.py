@@ -0,0 +1,93 @@
+import json
+import os
+import tempfile
+import unittest
+
+from assets import (
+    asset_manifest_name,
+    fingerprint_assets,
+    fingerprinted_path,
+    referenced_assets,
+    rewrite_references,
+    urls_digest,
+)
+from template import TemplateLoader
+from textnode import TextNode, set_asset_urls, text_node_to_html_node, text_type_image, text_type_link
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.src, "images"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.src, rel_path), "w") as file:
+            file.write(data)
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("images/kafka.png", "3f9a1c2b77"),
+                         "images/kafka.3f9a1c2b.png")
+
+    def test_fingerprint_assets(self):
+        self.write("index.css", "body {}")
+        self.write("images/a.png", "png")
+        self.write("robots.txt", "ignored")
+        record, urls, written, removed = fingerprint_assets(self.src, self.dst)
+        self.assertEqual(sorted(urls), ["/images/a.png", "/index.css"])
+        self.assertEqual(len(written), 2)
+        self.assertTrue(os.path.exists(os.path.join(self.dst, urls["/index.css"][1:])))
+        with open(os.path.join(self.dst, asset_manifest_name)) as file:
+            self.assertEqual(json.load(file), urls)
+
+        self.assertEqual(fingerprint_assets(self.src, self.dst, record)[2:], ([], []))
+
+        old = os.path.join(self.dst, urls["/index.css"][1:])
+        self.write("index.css", "body { color: red }")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        record, new_urls, written, removed = fingerprint_assets(self.src, self.dst, record)
+        self.assertEqual(list(new_urls), ["/index.css"])
+        self.assertNotEqual(new_urls["/index.css"], urls["/index.css"])
+        self.assertEqual(sorted(removed), sorted([old, os.path.join(self.dst, urls["/images/a.png"][1:])]))
+
+    def test_rewrite_references(self):
+        urls = {"/index.css": "/index.1234abcd.css"}
+        self.assertEqual(
+            rewrite_references('<link href="/index.css" /><a href="/other.css">', urls),
+            '<link href="/index.1234abcd.css" /><a href="/other.css">')
+
+    def test_referenced_assets(self):
+        markdown = "![k](/images/k.png) [css](/index.css) [page](/kafka) [ext](https://x/y.png)"
+        self.assertEqual(referenced_assets(markdown, {"/index.css": "/index.1234abcd.css"}),
+                         {"/images/k.png": None, "/index.css": "/index.1234abcd.css"})
+
+    def test_template_references_are_rewritten(self):
+        with open(os.path.join(self.src, "base.html"), "w") as file:
+            file.write('<link href="/index.css" />{{ Content }}')
+        plain = TemplateLoader(self.src).load("base.html")
+        loader = TemplateLoader(self.src, {"/index.css": "/index.1234abcd.css"})
+        template = loader.load("base.html")
+        self.assertEqual(template.chunks[0], '<link href="/index.1234abcd.css" />')
+        self.assertNotEqual(template.digest, plain.digest)
+
+        loader.set_asset_urls({"/index.css": "/index.5678abcd.css"})
+        self.assertEqual(loader.load("base.html").chunks[0], '<link href="/index.5678abcd.css" />')
+
+    def test_markdown_links_and_images_are_rewritten(self):
+        urls = {"/a.png": "/a.1234abcd.png"}
+        set_asset_urls(urls, urls_digest(urls))
+        try:
+            self.assertEqual(text_node_to_html_node(TextNode("a", text_type_image, "/a.png")).props["src"],
+                             "/a.1234abcd.png")
+            self.assertEqual(text_node_to_html_node(TextNode("a", text_type_link, "/a.png")).props,
+                             {"href": "/a.1234abcd.png"})
+        finally:
+            set_asset_urls({}, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from buildlog import Progress, configure_logging, log_event, shutdown_logging
+
+
+class TestBuildLog(unittest.TestCase):
+    def tearDown(self):
+        shutdown_logging()
+
+    def test_quiet_console_and_json_lines(self):
+        console = io.StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "build.jsonl")
+            configure_logging(verbose=False, json_path=path, stream=console)
+            log_event(logging.DEBUG, "page_generated",
+                      "Generated %s", "a.html", dest="a.html")
+            log_event(logging.INFO, "pages_generated",
+                      "%d pages generated", 1, generated=1)
+            shutdown_logging()
+            with open(path) as file:
+                events = [json.loads(line) for line in file]
+
+        self.assertEqual(console.getvalue(), "1 pages generated\n")
+        self.assertEqual([event["event"] for event in events],
+                         ["page_generated", "pages_generated"])
+        self.assertEqual(events[0]["dest"], "a.html")
+        self.assertEqual(events[0]["message"], "Generated a.html")
+
+    def test_verbose_console(self):
+        console = io.StringIO()
+        configure_logging(verbose=True, stream=console)
+        log_event(logging.DEBUG, "static_copied", "Copied %s", "x")
+        shutdown_logging()
+        self.assertEqual(console.getvalue(), "Copied x\n")
+
+    def test_progress_off_without_tty(self):
+        stream = io.StringIO()
+        progress = Progress("Generating pages", 3, stream=stream)
+        progress.update(3)
+        progress.done()
+        self.assertEqual(stream.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+import unittest
+
+from buildprofile import BuildProfiler, measure
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def test_records_stages(self):
+        profiler = BuildProfiler(allocations=True)
+        with profiler.stage("a.md", "parse"):
+            data = [0] * 10000
+        with measure(profiler, None, "sync_static"):
+            pass
+        self.assertEqual([record[:2] for record in profiler.records],
+                         [("a.md", "parse"), (None, "sync_static")])
+        self.assertGreater(profiler.records[0][5], len(data))
+
+    def test_summary_and_trace(self):
+        profiler = BuildProfiler(allocations=False)
+        for page in ("a.md", "b.md"):
+            with profiler.stage(page, "read"):
+                pass
+        summary = profiler.summary(1.0, slowest=1)
+        self.assertIn("Profile: 2 pages", summary)
+        self.assertIn("Slowest 1 pages", summary)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            profiler.write_trace(path)
+            with open(path) as file:
+                events = json.load(file)["traceEvents"]
+        self.assertEqual([event["args"]["page"]
+                         for event in events], ["a.md", "b.md"])
+
+    def test_drain_hands_over_records(self):
+        worker = BuildProfiler(allocations=False)
+        with worker.stage("a.md", "render"):
+            pass
+        parent = BuildProfiler(allocations=False)
+        parent.extend(worker.drain())
+        self.assertEqual(worker.records, [])
+        self.assertEqual(len(parent.records), 1)
+
+    def test_measure_without_profiler(self):
+        with measure(None, "a.md", "read"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_directory
+
+
+class TestCompressDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(data)
+        return path
+
+    def test_compresses_only_stale_files_over_min_size(self):
+        page = self.write("blog/index.html", "<p>hello</p>" * 200)
+        self.write("small.css", "a{}")
+        self.write("image.png", "x" * 5000)
+        compressed, removed = compress_directory(self.root, min_size=100)
+        self.assertEqual(compressed, [page + ".gz"])
+        with gzip.open(page + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 200)
+        self.assertEqual(os.stat(page + ".gz").st_mtime_ns, os.stat(page).st_mtime_ns)
+
+        self.assertEqual(compress_directory(self.root, min_size=100), ([], []))
+
+        self.write("blog/index.html", "<p>changed</p>" * 200)
+        self.assertEqual(compress_directory(self.root, min_size=100)[0], [page + ".gz"])
+
+    def test_orphaned_and_undersized_siblings_are_removed(self):
+        page = self.write("page.html", "<p>hello</p>" * 200)
+        compress_directory(self.root, min_size=100)
+        self.assertEqual(compress_directory(self.root, min_size=10000),
+                         ([], [page + ".gz"]))
+
+        compress_directory(self.root, min_size=100)
+        os.remove(page)
+        self.assertEqual(compress_directory(self.root), ([], [page + ".gz"]))
+
+    def test_unrelated_archives_are_kept(self):
+        archive = self.write("download.tar.gz", "not ours")
+        compress_directory(self.root)
+        self.assertTrue(os.path.exists(archive))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import json
+import os
+import tempfile
+import unittest
+
+from etags import write_etags
+
+
+class TestWriteEtags(unittest.TestCase):
+    def test_hashes_only_changed_files(self):
+        with tempfile.TemporaryDirectory() as public:
+            for name, text in (("index.html", "<p>a</p>"), ("index.html.gz", "zz"), ("a.css", "b{}")):
+                with open(os.path.join(public, name), "w") as file:
+                    file.write(text)
+            self.assertEqual(write_etags(public), 2)
+            self.assertEqual(write_etags(public), 0)
+
+            with open(os.path.join(public, "a.css"), "w") as file:
+                file.write("b{color:red}")
+            self.assertEqual(write_etags(public), 1)
+
+            with open(os.path.join(public, ".etags.json")) as file:
+                etags = json.load(file)
+            self.assertEqual(sorted(etags), ["a.css", "index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import datetime
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from feeds import parse_date, write_atom, write_rss, write_sitemaps
+
+sitemap_ns = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+
+class TestFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def locs(self, name):
+        root = ElementTree.parse(os.path.join(self.dir, name)).getroot()
+        return [loc.text for loc in root.iter(sitemap_ns + "loc")]
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("2024-05-01"),
+                         datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc))
+        self.assertIsNone(parse_date("someday"))
+        self.assertIsNone(parse_date(None))
+
+    def test_single_sitemap(self):
+        date = parse_date("2024-05-01")
+        count = write_sitemaps(iter([("/", date), ("/a&b.html", None)]),
+                               self.dir, "https://example.com/")
+        self.assertEqual(count, 2)
+        self.assertEqual(self.locs("sitemap.xml"),
+                         ["https://example.com/", "https://example.com/a&b.html"])
+        self.assertEqual(sorted(os.listdir(self.dir)), ["sitemap.xml"])
+
+    def test_sharded_sitemap_with_index(self):
+        urls = [(f"/{i}.html", None) for i in range(5)]
+        write_sitemaps(iter(urls), self.dir, "https://example.com", limit=2)
+        self.assertEqual(self.locs("sitemap.xml"), [
+            f"https://example.com/sitemap-{i}.xml" for i in (1, 2, 3)])
+        self.assertEqual(self.locs("sitemap-3.xml"), ["https://example.com/4.html"])
+
+        write_sitemaps(iter(urls[:3]), self.dir, "https://example.com", limit=2)
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         ["sitemap-1.xml", "sitemap-2.xml", "sitemap.xml"])
+
+        write_sitemaps(iter(urls[:1]), self.dir, "https://example.com", limit=2)
+        self.assertEqual(sorted(os.listdir(self.dir)), ["sitemap.xml"])
+
+    def test_rss_and_atom(self):
+        entries = [{"url": f"/{i}.html", "title": f"Post <{i}>", "date": f"2024-05-0{i}",
+                    "summary": "S" if i == 2 else None} for i in (3, 2, 1)]
+        rss_path = os.path.join(self.dir, "feed.xml")
+        atom_path = os.path.join(self.dir, "atom.xml")
+        write_rss(entries, rss_path, "https://example.com", "Site", size=2)
+        write_atom(entries, atom_path, "https://example.com", "Site", size=2)
+
+        items = ElementTree.parse(rss_path).getroot().findall("./channel/item")
+        self.assertEqual([item.findtext("title") for item in items], ["Post <3>", "Post <2>"])
+        self.assertEqual(items[1].findtext("description"), "S")
+        self.assertEqual(items[0].findtext("pubDate"), "Fri, 03 May 2024 00:00:00 +0000")
+
+        atom = "{http://www.w3.org/2005/Atom}"
+        root = ElementTree.parse(atom_path).getroot()
+        self.assertEqual(root.findtext(atom + "updated"), "2024-05-03T00:00:00+00:00")
+        self.assertEqual([entry.findtext(atom + "id") for entry in root.findall(atom + "entry")],
+                         ["https://example.com/3.html", "https://example.com/2.html"])
+
+    def test_atom_without_dated_entries_is_stable(self):
+        atom_path = os.path.join(self.dir, "atom.xml")
+        write_atom([], atom_path, "https://example.com", "Site", updated=parse_date("2024-05-01"))
+        os.utime(atom_path, ns=(0, 0))
+        write_atom([], atom_path, "https://example.com", "Site", updated=parse_date("2024-05-01"))
+        self.assertEqual(os.stat(atom_path).st_mtime_ns, 0)
+        root = ElementTree.parse(atom_path).getroot()
+        self.assertEqual(root.findtext("{http://www.w3.org/2005/Atom}updated"), "2024-05-01T00:00:00+00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from fragcache import FragmentCache, fragment_key
+from textnode import markdown_to_html_node
+
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "fragments.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fragments_survive_between_builds(self):
+        key = fragment_key("paragraph", "", "hello")
+        cache = FragmentCache(self.path, "v1")
+        self.assertEqual(cache.get_many([key]), {})
+        cache.put(key, "<p>hello</p>")
+        cache.close()
+
+        cache = FragmentCache(self.path, "v1")
+        self.assertEqual(cache.get_many([key]), {key: "<p>hello</p>"})
+        self.assertEqual(cache.get_many([key]), {key: "<p>hello</p>"})
+        stats = cache.drain_stats()
+        self.assertEqual(
+            (stats["disk_hits"], stats["memory_hits"], stats["misses"]), (1, 1, 0))
+        cache.close()
+
+    def test_new_generator_version_drops_fragments(self):
+        key = fragment_key("paragraph", "", "hello")
+        cache = FragmentCache(self.path, "v1")
+        cache.put(key, "<p>hello</p>")
+        cache.close()
+
+        cache = FragmentCache(self.path, "v2")
+        self.assertEqual(cache.get_many([key]), {})
+        self.assertEqual(cache.usage(), (0, 0))
+        cache.close()
+
+    def test_prune_evicts_least_recently_used(self):
+        cache = FragmentCache(self.path, "v1", max_bytes=25)
+        keys = [fragment_key(str(i)) for i in range(3)]
+        for used, key in enumerate(keys):
+            cache.put(key, "x" * 10)
+            cache.flush()
+            cache.connection.execute(
+                "UPDATE fragments SET used = ? WHERE key = ?", (used, key))
+            cache.connection.commit()
+
+        self.assertEqual(cache.prune(), 1)
+        cache.memory.clear()
+        self.assertEqual(set(cache.get_many(keys)), set(keys[1:]))
+        cache.close()
+
+    def test_cached_render_matches_uncached(self):
+        markdown = ("# Title\n\nSome **bold** text\n\n* one\n* two\n\n"
+                    "```\ncode\n```\n\nSome **bold** text {$class=note}")
+        cache = FragmentCache(self.path, "v1")
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html_node(markdown, cache).to_html(), expected)
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+
+import frontmatter
+from frontmatter import normalize_metadata, parse_simple_yaml, read_front_matter, split_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_yaml_fields_are_normalized(self):
+        metadata, body = split_front_matter(
+            "---\ntitle: Hello\ndate: 2024-05-01\ntags: [a, b]\ndraft: yes\n---\n# Hi\n")
+        self.assertEqual(metadata, {"title": "Hello", "date": "2024-05-01",
+                                    "tags": ["a", "b"], "draft": True})
+        self.assertEqual(body, "# Hi\n")
+
+    def test_toml_front_matter(self):
+        if frontmatter.tomllib is None:
+            self.skipTest("no TOML parser")
+        metadata, body = split_front_matter(
+            '+++\ntitle = "Hello"\ndate = 2024-05-01\ntags = ["a"]\ndraft = false\n+++\nbody')
+        self.assertEqual(metadata, {"title": "Hello", "date": "2024-05-01",
+                                    "tags": ["a"], "draft": False})
+        self.assertEqual(body, "body")
+
+    def test_comma_separated_tags(self):
+        metadata, _ = split_front_matter("---\ntags: a, b ,c\n---\n")
+        self.assertEqual(metadata["tags"], ["a", "b", "c"])
+
+    def test_single_value_is_one_tag(self):
+        for tags, expected in ((2024, ["2024"]), (1.5, ["1.5"]), (True, ["True"]), ((1, "a"), ["1", "a"])):
+            self.assertEqual(normalize_metadata({"tags": tags})["tags"], expected)
+
+    def test_invalid_yaml_raises(self):
+        if frontmatter.yaml is None:
+            self.skipTest("PyYAML not installed")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: [unclosed\n---\n")
+
+    def test_simple_yaml_fallback(self):
+        self.assertEqual(parse_simple_yaml("title: 'Hi'\ntags:\n  - a\n  - b\ndraft: true"),
+                         {"title": "Hi", "tags": ["a", "b"], "draft": "true"})
+
+
+class TestReadFrontMatter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.md")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, text):
+        with open(self.path, "w") as file:
+            file.write(text)
+        return read_front_matter(self.path)
+
+    def test_title_from_header(self):
+        self.assertEqual(self.read("---\ntitle: Header\n---\n# Heading\n"),
+                         {"title": "Header"})
+
+    def test_title_from_first_heading(self):
+        self.assertEqual(self.read("---\ntags: [x]\n---\n\n# Heading\n\ntext"),
+                         {"tags": ["x"], "title": "Heading"})
+        self.assertEqual(self.read("intro\n# Heading\n"), {"title": "Heading"})
+
+    def test_error_names_the_file(self):
+        with self.assertRaisesRegex(ValueError, "^" + self.path + ": "):
+            self.read("+++\ntitle = \n+++\n# Heading\n")
+
+    def test_unterminated_header_is_body(self):
+        self.assertEqual(self.read("---\ntitle: x\n# Heading\n"),
+                         {"title": "Heading"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import EscapedLeafNode, LeafNode, ParentNode, HTMLNode, Raw, escape_attribute, escape_text
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -23,6 +24,40 @@ class TestHTMLNode(unittest.TestCase):
         node = LeafNode(None, "Hello, world!")
         self.assertEqual(node.to_html(), "Hello, world!")
 
+    def test_text_is_escaped(self):
+        self.assertEqual(LeafNode("p", "a < b & c > d").to_html(), "<p>a &lt; b &amp; c &gt; d</p>")
+        self.assertEqual(LeafNode(None, 'say "hi"').to_html(), 'say "hi"')
+
+    def test_attributes_are_escaped(self):
+        node = LeafNode("a", "x", {"href": '/search?q="a"&b=<c>'})
+        self.assertEqual(node.to_html(), '<a href="/search?q=&quot;a&quot;&amp;b=&lt;c&gt;">x</a>')
+
+    def test_values_that_are_not_strings(self):
+        self.assertEqual(LeafNode("img", "", {"width": 100, "alt": 'a "b"'}).to_html(),
+                         '<img width="100" alt="a &quot;b&quot;">')
+        self.assertEqual(LeafNode(None, 5).to_html(), "5")
+        self.assertEqual(LeafNode("p", 1.5).to_html(), "<p>1.5</p>")
+
+    def test_raw_is_not_escaped(self):
+        self.assertEqual(LeafNode("code", Raw("<span>&lt;</span>")).to_html(),
+                         "<code><span>&lt;</span></code>")
+
+    def test_escaped_leaf_is_written_as_it_is(self):
+        node = EscapedLeafNode("a", "x &amp; y", {"href": "/q?a=1&amp;b=2"})
+        self.assertEqual(node.to_html(), '<a href="/q?a=1&amp;b=2">x &amp; y</a>')
+        self.assertEqual(node, LeafNode("a", "x &amp; y", {"href": "/q?a=1&amp;b=2"}))
+
+    def test_void_elements_have_no_closing_tag(self):
+        self.assertEqual(EscapedLeafNode("source", "", {"type": "image/webp", "srcset": "/a-480w.webp 480w"}).to_html(),
+                         '<source type="image/webp" srcset="/a-480w.webp 480w">')
+        self.assertEqual(EscapedLeafNode("br", "").to_html(), "<br>")
+        self.assertEqual(LeafNode("hr", "").to_html(), "<hr>")
+
+    def test_fast_path_returns_the_same_string(self):
+        text = "plain text"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
     def test_to_html_with_children(self):
         child_node = LeafNode("span", "child")
         parent_node = ParentNode("div", [child_node])
@@ -68,6 +103,45 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+            {"class": "wrap"},
+        )
+        sink = io.StringIO()
+        node.write_html(sink)
+        self.assertEqual(sink.getvalue(), node.to_html())
+
+        sink = io.StringIO()
+        ParentNode("ul", []).write_html(sink)
+        self.assertEqual(sink.getvalue(), "<ul></ul>")
+
+    def test_leaf_eq(self):
+        self.assertEqual(LeafNode("b", "x"), LeafNode("b", "x"))
+        self.assertNotEqual(LeafNode("b", "x"), LeafNode("i", "x"))
+        self.assertNotEqual(LeafNode("b", "x"), LeafNode("b", "y"))
+        self.assertNotEqual(LeafNode("a", "x", {"href": "/a"}),
+                            LeafNode("a", "x", {"href": "/b"}))
+
+    def test_parent_eq(self):
+        self.assertEqual(ParentNode("p", [LeafNode(None, "x")]),
+                         ParentNode("p", [LeafNode(None, "x")]))
+        self.assertNotEqual(ParentNode("p", [LeafNode(None, "x")]),
+                            ParentNode("p", [LeafNode(None, "y")]))
+        self.assertNotEqual(ParentNode("p", []), ParentNode("div", []))
+
+    def test_nodes_have_no_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", []), "__dict__"))
+
+    def test_to_html_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("div").to_html()
+
 
 if __name__ == "__main__":
     unittest.main()
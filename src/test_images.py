@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from images import Image, image_attributes, process_images, variant_path
+from manifest import hash_file
+from textnode import TextNode, set_asset_urls, text_node_to_html_node, text_type_image
+
+
+class TestImageNode(unittest.TestCase):
+    def tearDown(self):
+        set_asset_urls({}, "")
+
+    def test_lazy_img_without_variants(self):
+        node = text_node_to_html_node(TextNode("a", text_type_image, "/a.gif"))
+        self.assertEqual(node, LeafNode("img", "", {"src": "/a.gif", "alt": "a",
+                                                    "loading": "lazy", "decoding": "async"}))
+
+    def test_picture_with_variants(self):
+        images = {"/a.png": (1000, 500, "/a-480w.12345678.webp 480w, /a-1000w.12345678.webp 1000w")}
+        set_asset_urls({"/a.png": "/a.abcdef12.png"}, "test", images)
+        node = text_node_to_html_node(TextNode("a", text_type_image, "/a.png"))
+        self.assertEqual(node, ParentNode("picture", [
+            LeafNode("source", "", {"type": "image/webp", "srcset": images["/a.png"][2],
+                                    "sizes": "(max-width: 1000px) 100vw, 1000px"}),
+            LeafNode("img", "", {"src": "/a.abcdef12.png", "alt": "a", "width": "1000", "height": "500",
+                                 "loading": "lazy", "decoding": "async"}),
+        ]))
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.src, "images"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assets(self, *rel_paths):
+        record = {}
+        for rel_path in rel_paths:
+            path = os.path.join(self.src, rel_path)
+            record[rel_path] = [os.path.getsize(path), 0, hash_file(path)]
+        return record
+
+    def test_variants(self):
+        Image.new("RGB", (1000, 500), "red").save(os.path.join(self.src, "images/a.png"))
+        with open(os.path.join(self.src, "images/b.png"), "w") as file:
+            file.write("not an image")
+        assets = self.assets("images/a.png", "images/b.png")
+        record, written, removed, failed = process_images(
+            self.src, self.dst, assets, cache_dir=self.cache_dir, jobs=1)
+        entry = record["images/a.png"]
+        self.assertEqual((entry["width"], entry["height"]), (1000, 500))
+        self.assertEqual([width for _, width in entry["variants"]], [480, 960, 1000])
+        self.assertEqual(entry["variants"][0][0], "/" + variant_path("images/a.png", entry["key"], 480))
+        self.assertEqual(len(written), 3)
+        self.assertEqual(failed, ["images/b.png"])
+        with Image.open(written[0]) as variant:
+            self.assertEqual((variant.format, variant.size), ("WEBP", (480, 240)))
+        self.assertEqual(image_attributes(record)["/images/a.png"][:2], (1000, 500))
+
+        again, written, removed, failed = process_images(
+            self.src, self.dst, assets, record, cache_dir=self.cache_dir, jobs=1)
+        self.assertEqual((again, written, removed), (record, [], []))
+
+        Image.new("RGB", (300, 300), "blue").save(os.path.join(self.src, "images/a.png"))
+        changed, written, removed, _ = process_images(
+            self.src, self.dst, self.assets("images/a.png"), record, cache_dir=self.cache_dir, jobs=1)
+        self.assertEqual([width for _, width in changed["images/a.png"]["variants"]], [300])
+        self.assertEqual(len(written), 1)
+        self.assertEqual(len(removed), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
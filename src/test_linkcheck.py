@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import main
+from linkcheck import find_broken_links, page_links, resolve
+from manifest import BuildManifest
+
+
+class TestPageLinks(unittest.TestCase):
+    def test_lines(self):
+        markdown = "# Title\n\nSee [home](/) and ![img](/images/a.png).\n\n[next](next.html)"
+        self.assertEqual(page_links(markdown), [["/", 3], ["/images/a.png", 3], ["next.html", 5]])
+
+    def test_first_line(self):
+        self.assertEqual(page_links("[a](/a)", 5), [["/a", 5]])
+
+    def test_code_is_not_a_link(self):
+        markdown = "```\n[a](/in-code)\n```\n\n`[b](/inline)` **[c](/bold)** [d](/d)"
+        self.assertEqual(page_links(markdown), [["/d", 5]])
+
+
+class TestResolve(unittest.TestCase):
+    targets = {"index.html", "blog/index.html", "blog/post.html", "images/a.png"}
+
+    def test_external(self):
+        for url in ("https://example.com/x", "//cdn.example.com/x", "mailto:a@b.c", "#top"):
+            self.assertTrue(resolve(url, "/", self.targets), url)
+
+    def test_internal(self):
+        for url in ("/", "/blog", "/blog/", "/blog/post.html#part", "/images/a.png?v=1", "/images/%61.png"):
+            self.assertTrue(resolve(url, "/", self.targets), url)
+        for url in ("/missing", "/blog/post", "/images/b.png", "/blog/post.html/"):
+            self.assertFalse(resolve(url, "/", self.targets), url)
+
+    def test_relative(self):
+        self.assertTrue(resolve("post.html", "/blog/", self.targets))
+        self.assertTrue(resolve("../images/a.png", "/blog/post.html", self.targets))
+        self.assertFalse(resolve("post.html", "/", self.targets))
+
+
+class TestFindBrokenLinks(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "index.md")
+        with open(self.source, "w") as file:
+            file.write("# Home\n")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_report(self):
+        dest = os.path.join(self.tmp.name, "public")
+        self.manifest.static = {"index.css": [0, 0]}
+        self.manifest.assets = {"index.css": [0, 0, "3f9a1c2b77"]}
+        self.manifest.record_page(self.source, os.path.join(dest, "index.html"), "base.html", "x",
+                                  links=[["/index.css", 2], ["/index.3f9a1c2b.css", 3],
+                                         ["/feed.xml", 4], ["/gone", 5]])
+        broken, checked = find_broken_links(self.manifest, dest, ("feed.xml",))
+        self.assertEqual(checked, 4)
+        self.assertEqual(broken, [(self.source, 5, "/gone")])
+
+    def test_unchanged_build_reuses_the_result(self):
+        dest = os.path.join(self.tmp.name, "public")
+        self.manifest.record_page(self.source, os.path.join(dest, "index.html"), "base.html", "x",
+                                  links=[["/gone", 5]])
+        self.assertEqual(main.check_links(self.manifest, dest), 1)
+        self.manifest.save()
+
+        manifest = BuildManifest(self.manifest.path)
+        with mock.patch.object(main, "find_broken_links") as find:
+            self.assertEqual(main.check_links(manifest, dest), 1)
+        find.assert_not_called()
+        self.assertFalse(manifest.dirty)
+
+        manifest.listings = {"gone/index.html": "digest"}
+        self.assertEqual(main.check_links(manifest, dest), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
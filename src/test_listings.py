@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from listings import generate_listings, listing_pages, paginate, slugify, unique_slugs
+from pageindex import PageIndex
+from template import Template
+
+
+def entry(url, title, date=None, tags=(), draft=False):
+    return {"dest": None, "url": url, "title": title, "date": date, "summary": None,
+            "tags": list(tags), "draft": draft, "template": None}
+
+
+class FakeIndex(PageIndex):
+    def __init__(self, entries):
+        self.entries = {f"content{item['url']}.md": item for item in entries}
+
+
+class TestListings(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("C++ & Web"), "c-web")
+        self.assertEqual(slugify("日本語"), "日本語")
+        self.assertEqual(slugify("Ελληνικά"), "ελληνικά")
+        self.assertEqual(slugify("snake_case"), "snake-case")
+
+    def test_colliding_tags_get_distinct_pages(self):
+        self.assertEqual(unique_slugs(["c++", "c#", "c", "🎉", "✨"]),
+                         {"c": "c", "c#": "c-2", "c++": "c-3", "✨": "-", "🎉": "-2"})
+        index = FakeIndex([entry("/a", "A", "2024-01-01", ["c++"]),
+                           entry("/b", "B", "2024-02-01", ["c#"])])
+        listings = {page.url: page for page in listing_pages(index)}
+        self.assertEqual([item[0] for item in listings["/tags/"].entries], ["/tags/c/", "/tags/c-2/"])
+        self.assertEqual([item["title"] for item in listings["/tags/c/"].entries], ["B"])
+        self.assertEqual([item["title"] for item in listings["/tags/c-2/"].entries], ["A"])
+
+    def test_pagination_is_stable_when_posts_are_added(self):
+        posts = [entry(f"/p{i}", f"P{i}") for i in range(7, 0, -1)]
+        pages = paginate("/archive/", "Archive", posts, per_page=3)
+        self.assertEqual([page.url for page in pages],
+                         ["/archive/", "/archive/page/2/", "/archive/page/1/"])
+        self.assertEqual([[item["title"] for item in page.entries] for page in pages],
+                         [["P7"], ["P6", "P5", "P4"], ["P3", "P2", "P1"]])
+        self.assertEqual(pages[0].older_url, "/archive/page/2/")
+        self.assertEqual(pages[1].newer_url, "/archive/")
+
+        newer = paginate("/archive/", "Archive",
+                         [entry("/p8", "P8")] + posts, per_page=3)
+        self.assertEqual([page.digest() for page in newer[1:]],
+                         [page.digest() for page in pages[1:]])
+
+    def test_listing_pages(self):
+        index = FakeIndex([
+            entry("/", "Home"),
+            entry("/blog/a.html", "A", "2024-01-01", ["x"]),
+            entry("/blog/b.html", "B", "2024-02-01", ["x", "y"]),
+            entry("/blog/c.html", "C", "2024-03-01", ["y"], draft=True),
+            entry("/docs/", "Docs"),
+            entry("/docs/intro.html", "Intro"),
+        ])
+        listings = {page.url: [item["title"] if isinstance(item, dict) else item[1]
+                               for item in page.entries]
+                    for page in listing_pages(index)}
+        self.assertEqual(listings, {
+            "/archive/": ["B", "A"],
+            "/tags/": ["x", "y"],
+            "/tags/x/": ["B", "A"],
+            "/tags/y/": ["B"],
+            "/blog/": ["B", "A"],
+        })
+
+    def test_unchanged_listings_are_not_rewritten(self):
+        index = FakeIndex([entry("/blog/a.html", "A", "2024-01-01")])
+        template = Template("base.html", ["<body>", "</body>"], ["Content"], [], "t1")
+        with tempfile.TemporaryDirectory() as tmp:
+            record, written, removed = generate_listings(index, template, tmp)
+            self.assertEqual(len(written), 2)
+            with open(os.path.join(tmp, "archive", "index.html")) as file:
+                self.assertIn('<a href="/blog/a.html">A</a>', file.read())
+
+            record, written, removed = generate_listings(index, template, tmp, record)
+            self.assertEqual(written, [])
+
+            index.entries.clear()
+            record, written, removed = generate_listings(index, template, tmp, record)
+            self.assertEqual((record, len(removed)), ({}, 2))
+            self.assertEqual(os.listdir(tmp), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
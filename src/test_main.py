@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from main import generate_page, generate_pages_recursive
+from sync import walk_files
+
+
+pages = {
+    "index.md": "# Home\n\nWelcome, see [the blog](/blog/) and [a post](/blog/one.html).\n",
+    "blog/index.md": "# Blog\n\n* [One](/blog/one.html)\n* [Two](/blog/two.html)\n",
+    "blog/one.md": "---\ntitle: First post\n---\n# One\n\nSome **bold** and *italic* text, `code` too.\n",
+    "blog/two.md": "# Two\n\n```python\nprint(1 < 2)\n```\n\n> a quote\n\n1. first\n2. second\n",
+    "docs/guide/setup.md": "# Setup & use\n\n![diagram](/images/diagram.png)\n\n## Steps\n\nRun it.\n",
+}
+
+
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        for rel_path, text in pages.items():
+            path = os.path.join(self.content, rel_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(text)
+        self.template = os.path.join(self.tmp.name, "templates", "base.html")
+        os.makedirs(os.path.dirname(self.template))
+        with open(self.template, "w") as file:
+            file.write("<html><title>{{ Title }}</title><body>{{ Content }}</body></html>\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, jobs):
+        dest = os.path.join(self.tmp.name, f"public-{jobs}")
+        generate_pages_recursive(self.content, self.template, dest, jobs=jobs)
+        outputs = {}
+        for rel_path, entry in walk_files(dest):
+            with open(entry.path, "rb") as file:
+                outputs[rel_path] = file.read()
+        return outputs
+
+    def test_parallel_build_matches_serial_build(self):
+        serial = self.build(jobs=1)
+        self.assertEqual(len(serial), len(pages))
+        self.assertEqual(self.build(jobs=2), serial)
+
+    def test_front_matter_error_names_the_page(self):
+        source = os.path.join(self.content, "broken.md")
+        with open(source, "w") as file:
+            file.write("+++\ntitle = \n+++\n# Broken\n")
+        with self.assertRaisesRegex(ValueError, "^" + source + ": "):
+            generate_page(source, self.template, os.path.join(self.tmp.name, "broken.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
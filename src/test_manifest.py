@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+
+from manifest import BuildManifest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.dest = os.path.join(self.tmp.name, "page.html")
+        self.path = os.path.join(self.tmp.name, "manifest.json")
+        with open(self.source, "w") as file:
+            file.write("# Page")
+        with open(self.dest, "w") as file:
+            file.write("<h1>Page</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, template_digest="t1", version="v1"):
+        manifest = BuildManifest(self.path, version)
+
+        def digests(name):
+            return template_digest
+
+        changed = manifest.page_changed(self.source, self.dest, digests)
+        if changed:
+            manifest.record_page(self.source, self.dest,
+                                 "base.html", template_digest)
+        manifest.save()
+        return changed
+
+    def test_unchanged_page_is_skipped(self):
+        self.assertTrue(self.build())
+        self.assertFalse(self.build())
+
+    def test_touched_page_with_same_content_is_skipped(self):
+        self.build()
+        os.utime(self.source, ns=(0, 0))
+        self.assertFalse(self.build())
+
+    def test_edited_page_is_rebuilt(self):
+        self.build()
+        with open(self.source, "w") as file:
+            file.write("# Page 2")
+        self.assertTrue(self.build())
+
+    def test_template_change_rebuilds(self):
+        self.build()
+        self.assertTrue(self.build(template_digest="t2"))
+
+    def test_version_change_rebuilds(self):
+        self.build()
+        self.assertTrue(self.build(version="v2"))
+
+    def test_missing_output_rebuilds(self):
+        self.build()
+        os.remove(self.dest)
+        self.assertTrue(self.build())
+
+    def test_new_asset_fingerprint_rebuilds(self):
+        manifest = BuildManifest(self.path, "v1")
+        manifest.record_page(self.source, self.dest, "base.html", "t1",
+                             {"/a.png": "/a.11111111.png"})
+        manifest.save()
+
+        manifest = BuildManifest(self.path, "v1")
+
+        def digests(name):
+            return "t1"
+
+        self.assertFalse(manifest.page_changed(
+            self.source, self.dest, digests, {"/a.png": "/a.11111111.png", "/b.css": "/b.22222222.css"}))
+        self.assertTrue(manifest.page_changed(
+            self.source, self.dest, digests, {"/a.png": "/a.33333333.png"}))
+
+    def test_new_image_variants_rebuild(self):
+        urls = {"/a.png": "/a.11111111.png"}
+        variants = {"/a.png": (960, 640, "/a-480w.aaaaaaaa.webp 480w, /a-960w.aaaaaaaa.webp 960w")}
+        manifest = BuildManifest(self.path, "v1")
+        manifest.record_page(self.source, self.dest, "base.html", "t1", dict(urls), images=variants)
+        manifest.save()
+
+        manifest = BuildManifest(self.path, "v1")
+
+        def digests(name):
+            return "t1"
+
+        self.assertFalse(manifest.page_changed(self.source, self.dest, digests, urls, variants))
+        upgraded = {"/a.png": (960, 640, "/a-480w.bbbbbbbb.webp 480w, /a-960w.bbbbbbbb.webp 960w")}
+        self.assertTrue(manifest.page_changed(self.source, self.dest, digests, urls, upgraded))
+        self.assertTrue(manifest.page_changed(self.source, self.dest, digests, urls, {}))
+
+        manifest.record_page(self.source, self.dest, "base.html", "t1", dict(urls), images={})
+        self.assertTrue(manifest.page_changed(self.source, self.dest, digests, urls, variants))
+
+    def test_noop_build_does_not_rewrite_manifest(self):
+        self.build()
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(self.build())
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+        manifest = BuildManifest(self.path, "v1")
+        manifest.static = {"a.css": [1, 2]}
+        manifest.static = {"a.css": [1, 2]}
+        self.assertTrue(manifest.dirty)
+        manifest.save()
+        manifest = BuildManifest(self.path, "v1")
+        manifest.static = {"a.css": [1, 2]}
+        self.assertFalse(manifest.dirty)
+
+    def test_removed_source_reports_output(self):
+        self.build()
+        manifest = BuildManifest(self.path, "v1")
+        self.assertEqual(manifest.remove_stale_pages(), [self.dest])
+
+    def test_outputs_are_recorded_relative_to_dest_dir(self):
+        def digests(name):
+            return "t1"
+
+        staging = os.path.join(self.tmp.name, "staging")
+        os.makedirs(staging)
+        with open(os.path.join(staging, "page.html"), "w") as file:
+            file.write("<h1>Page</h1>")
+        manifest = BuildManifest(self.path, "v1", dest_dir=self.tmp.name)
+        manifest.record_page(self.source, self.dest, "base.html", "t1")
+        self.assertEqual(manifest.pages[self.source]["dest"], "page.html")
+        manifest.save()
+
+        manifest = BuildManifest(self.path, "v1", dest_dir=staging)
+        staged_dest = os.path.join(staging, "page.html")
+        self.assertFalse(manifest.page_changed(self.source, staged_dest, digests))
+        manifest = BuildManifest(self.path, "v1", dest_dir=staging)
+        self.assertEqual(manifest.remove_stale_pages(), [staged_dest])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+import output
+from output import StagedOutput, staging_path, stream_file, write_file
+
+
+class TestWriteFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "a", "b", "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unchanged_bytes_are_not_rewritten(self):
+        self.assertTrue(write_file(self.path, "<p>é</p>"))
+        os.utime(self.path, ns=(0, 0))
+        inode = os.stat(self.path).st_ino
+        self.assertFalse(write_file(self.path, "<p>é</p>"))
+        self.assertEqual((os.stat(self.path).st_ino, os.stat(self.path).st_mtime_ns), (inode, 0))
+        self.assertTrue(write_file(self.path, "<p>e</p>"))
+        self.assertNotEqual(os.stat(self.path).st_ino, inode)
+        with open(self.path) as file:
+            self.assertEqual(file.read(), "<p>e</p>")
+
+    def test_streamed_pieces_are_compared_as_they_come(self):
+        def fill(*pieces):
+            return lambda file: [file.write(piece) for piece in pieces]
+
+        self.assertTrue(stream_file(self.path, fill("<p>", "é" * 3000, "</p>")))
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(stream_file(self.path, fill("<p>", "é" * 1000, "é" * 2000, "</p>")))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        for pieces in (("<p>", "é" * 3000, "</p>", "!"), ("<p>", "é" * 3000), ("<p>", "é" * 2999, "e</p>")):
+            self.assertTrue(stream_file(self.path, fill(*pieces)))
+            with open(self.path) as file:
+                self.assertEqual(file.read(), "".join(pieces))
+
+        def fail(file):
+            file.write("<p>changed")
+            raise ValueError("render failed")
+
+        with self.assertRaises(ValueError):
+            stream_file(self.path, fail)
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["page.html"])
+
+    def test_directory_removed_behind_the_cache(self):
+        write_file(self.path, "x")
+        os.remove(self.path)
+        os.rmdir(os.path.dirname(self.path))
+        self.assertTrue(write_file(self.path, "y"))
+
+
+class TestStagedOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.live = os.path.join(self.tmp.name, "public")
+        self.output = StagedOutput(self.live)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, root, rel_path):
+        with open(os.path.join(root, rel_path)) as file:
+            return file.read()
+
+    def build(self, files, removed=()):
+        self.output.prepare()
+        for rel_path, text in files.items():
+            write_file(os.path.join(self.output.staging, rel_path), text)
+        for rel_path in removed:
+            os.remove(os.path.join(self.output.staging, rel_path))
+        return self.output.publish()
+
+    def test_staging_path(self):
+        self.assertEqual(staging_path("site/public/"), os.path.join("site", ".public.staging"))
+
+    def test_builds_are_swapped_in(self):
+        self.assertTrue(self.build({"index.html": "one", "blog/post.html": "post"}))
+        self.assertFalse(os.path.exists(self.output.staging))
+        self.assertTrue(self.build({"index.html": "two"}, removed=["blog/post.html"]))
+        self.assertEqual(self.read(self.live, "index.html"), "two")
+        self.assertFalse(os.path.exists(os.path.join(self.live, "blog/post.html")))
+        self.assertEqual(self.read(self.output.staging, "index.html"), "one")
+
+        linked, removed = self.output.prepare()
+        self.assertEqual((linked, removed), (1, 1))
+        self.assertEqual(os.stat(os.path.join(self.output.staging, "index.html")).st_ino,
+                         os.stat(os.path.join(self.live, "index.html")).st_ino)
+        self.assertEqual(self.output.prepare(), (0, 0))
+
+    def test_fallback_without_renameat2(self):
+        self.build({"index.html": "one"})
+        saved = output._renameat2
+        output._renameat2 = False
+        try:
+            self.assertFalse(self.build({"index.html": "two"}))
+        finally:
+            output._renameat2 = saved
+        self.assertEqual(self.read(self.live, "index.html"), "two")
+        self.assertEqual(self.read(self.output.staging, "index.html"), "one")
+
+
+if __name__ == "__main__":
+    unittest.main()
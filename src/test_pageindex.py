@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from pageindex import PageIndex, page_url
+
+
+class TestPageIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.path = os.path.join(self.tmp.name, "pages.json")
+        os.makedirs(self.content)
+        self.pages = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        source = os.path.join(self.content, name + ".md")
+        with open(source, "w") as file:
+            file.write(text)
+        self.pages.append((source, os.path.join(self.public, name + ".html")))
+        return source
+
+    def test_page_url(self):
+        self.assertEqual(page_url("public/index.html", "public"), "/")
+        self.assertEqual(page_url("public/blog/index.html", "public"), "/blog/")
+        self.assertEqual(page_url("public/blog/post.html", "public"), "/blog/post.html")
+
+    def test_query_by_date_and_tag(self):
+        self.write("old", "---\ndate: 2023-01-01\ntags: [a]\n---\n# Old\n")
+        self.write("new", "---\ndate: 2024-01-01\ntags: [a, b]\n---\n# New\n")
+        self.write("draft", "---\ndate: 2025-01-01\ndraft: true\ntags: [a]\n---\n# Draft\n")
+        self.write("undated", "# Undated\n")
+        index = PageIndex(self.path, "v1")
+        index.scan(self.pages, self.public)
+
+        titles = [entry["title"] for _, entry in index.by_date()]
+        self.assertEqual(titles, ["New", "Old", "Undated"])
+        tags = {tag: [entry["title"] for _, entry in pages]
+                for tag, pages in index.tags().items()}
+        self.assertEqual(tags, {"a": ["New", "Old"], "b": ["New"]})
+        self.assertEqual(len(index.published(drafts=True)), 4)
+
+    def test_saved_index_skips_unchanged_headers(self):
+        self.write("one", "# One\n")
+        source = self.write("two", "# Two\n")
+        index = PageIndex(self.path, "v1")
+        index.scan(self.pages, self.public)
+        self.assertEqual(index.scanned, 2)
+        index.save()
+
+        os.utime(self.path, ns=(0, 0))
+        index = PageIndex(self.path, "v1")
+        index.scan(self.pages, self.public)
+        index.save()
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+
+        with open(source, "w") as file:
+            file.write("# Two, longer\n")
+        index = PageIndex(self.path, "v1")
+        index.scan(self.pages, self.public)
+        self.assertEqual(index.scanned, 1)
+        self.assertEqual(index.entries[source]["title"], "Two, longer")
+
+        index.scan(self.pages[:1], self.public)
+        self.assertEqual(list(index.entries), [self.pages[0][0]])
+
+    def test_new_version_rescans(self):
+        self.write("one", "# One\n")
+        index = PageIndex(self.path, "v1")
+        index.scan(self.pages, self.public)
+        index.save()
+        index = PageIndex(self.path, "v2")
+        index.scan(self.pages, self.public)
+        self.assertEqual(index.scanned, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+
+from sync import sync_directory
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.write(self.src, "index.css", "body {}")
+        self.write(self.src, "images/a.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, root, rel_path, text):
+        path = os.path.join(root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, rel_path):
+        with open(os.path.join(self.dst, rel_path)) as file:
+            return file.read()
+
+    def test_copies_then_skips(self):
+        record, copied, _ = sync_directory(self.src, self.dst)
+        self.assertEqual(len(copied), 2)
+        self.assertEqual(self.read("images/a.png"), "png")
+        _, copied, _ = sync_directory(self.src, self.dst, record)
+        self.assertEqual(copied, [])
+
+    def test_copies_changed_file(self):
+        record, _, _ = sync_directory(self.src, self.dst)
+        self.write(self.src, "index.css", "body { color: red }")
+        _, copied, _ = sync_directory(self.src, self.dst, record)
+        self.assertEqual(copied, [(os.path.join(self.src, "index.css"),
+                                   os.path.join(self.dst, "index.css"))])
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_removes_only_stale_files(self):
+        record, _, _ = sync_directory(self.src, self.dst)
+        self.write(self.dst, "index.html", "<p>page</p>")
+        os.remove(os.path.join(self.src, "images/a.png"))
+        _, _, removed = sync_directory(self.src, self.dst, record)
+        self.assertEqual(removed, [os.path.join(self.dst, "images/a.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertEqual(self.read("index.html"), "<p>page</p>")
+
+    def test_checksum_ignores_mtime(self):
+        record, _, _ = sync_directory(self.src, self.dst)
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        _, copied, _ = sync_directory(self.src, self.dst, record, checksum=True)
+        self.assertEqual(copied, [])
+
+    def test_hardlink(self):
+        sync_directory(self.src, self.dst, link="hardlink")
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.src, "index.css"), os.path.join(self.dst, "index.css")))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import TemplateLoader, parse_template
+from frontmatter import split_front_matter
+
+
+class TestTemplate(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.loader = TemplateLoader(self.tmp.name)
+        self.write("base.html",
+                   "<title>{{ Title }}</title>{% block body %}<main>{{ Content }}</main>{% endblock %}<footer>{% block footer %}base{% endblock %}</footer>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, source, mtime_ns=None):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as file:
+            file.write(source)
+        if mtime_ns is not None:
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def test_render(self):
+        template = self.loader.load("base.html")
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            "<title>Hi</title><main><p>x</p></main><footer>base</footer>",
+        )
+
+    def test_write_streams_nodes(self):
+        template = self.loader.load("base.html")
+        content = ParentNode("p", [LeafNode("b", "x")])
+        sink = io.StringIO()
+        template.write(sink, {"Title": "Hi", "Content": content})
+        self.assertEqual(sink.getvalue(), template.render(
+            {"Title": "Hi", "Content": content}))
+
+    def test_unknown_slot_is_kept(self):
+        self.write("plain.html", "{{ Title }} {{ Other }}")
+        template = self.loader.load("plain.html")
+        self.assertEqual(template.render({"Title": "Hi"}), "Hi {{ Other }}")
+
+    def test_inheritance(self):
+        self.write("post.html",
+                   '{% extends "base.html" %}{% block body %}<article>{{ Content }}</article>{% endblock %}')
+        template = self.loader.load("post.html")
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "x"}),
+            "<title>Hi</title><article>x</article><footer>base</footer>",
+        )
+        self.assertEqual(len(template.dependencies), 2)
+
+    def test_cached_until_mtime_changes(self):
+        self.write("page.html", "one", mtime_ns=1_000_000_000)
+        first = self.loader.load("page.html")
+        self.assertIs(self.loader.load("page.html"), first)
+        self.write("page.html", "two", mtime_ns=2_000_000_000)
+        second = self.loader.load("page.html")
+        self.assertEqual(second.render({}), "two")
+        self.assertNotEqual(first.digest, second.digest)
+
+    def test_unclosed_block(self):
+        with self.assertRaises(ValueError):
+            parse_template("{% block body %}", "x.html")
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        metadata, body = split_front_matter(
+            "---\ntemplate: post.html\ntitle: \"Hi\"\n---\n# Hi")
+        self.assertEqual(metadata, {"template": "post.html", "title": "Hi"})
+        self.assertEqual(body, "# Hi")
+
+    def test_no_front_matter(self):
+        self.assertEqual(split_front_matter("# Hi"), ({}, "# Hi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,9 +10,10 @@ from textnode import (
     text_type_link,
 )
 
-from textnode import split_nodes_delimiter, extract_markdown_links, extract_markdown_images, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, markdown_to_html_node
+from textnode import split_nodes_delimiter, extract_markdown_links, extract_markdown_images, split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, markdown_to_html_node, scan_blocks, Block, text_to_children, drain_inline_stats, text_node_to_html_node, block_type_code, block_type_heading, block_type_paragraph, block_type_unordered_list
 
-from htmlnode import ParentNode, LeafNode
+from highlight import version as highlight_version
+from htmlnode import EscapedLeafNode, ParentNode, LeafNode
 
 
 class TestTextNode(unittest.TestCase):
@@ -158,6 +159,16 @@ class TestSplitNodesLink(unittest.TestCase):
         ]
         self.assertEqual(new_nodes, expected_nodes)
 
+    def test_split_nodes_link_repeated_link(self):
+        node = TextNode("[a](/x) and [a](/x)", text_type_text)
+        new_nodes = split_nodes_link([node])
+        expected_nodes = [
+            TextNode("a", text_type_link, "/x"),
+            TextNode(" and ", text_type_text),
+            TextNode("a", text_type_link, "/x"),
+        ]
+        self.assertEqual(new_nodes, expected_nodes)
+
 
 class TestTextToTextNodes(unittest.TestCase):
     def test_text_to_textnodes(self):
@@ -178,6 +189,35 @@ class TestTextToTextNodes(unittest.TestCase):
         ]
         self.assertEqual(nodes, expected_nodes)
 
+    def test_repeated_link(self):
+        text = "[a](/x) and [a](/x)"
+        nodes = text_to_textnodes(text)
+        expected_nodes = [
+            TextNode("a", text_type_link, "/x"),
+            TextNode(" and ", text_type_text),
+            TextNode("a", text_type_link, "/x"),
+        ]
+        self.assertEqual(nodes, expected_nodes)
+
+    def test_code_is_not_split(self):
+        nodes = text_to_textnodes("run `a*b*c` now")
+        expected_nodes = [
+            TextNode("run ", text_type_text),
+            TextNode("a*b*c", text_type_code),
+            TextNode(" now", text_type_text),
+        ]
+        self.assertEqual(nodes, expected_nodes)
+
+    def test_unmatched_delimiters_stay_text(self):
+        for text in ("2 ** 3 = 8", "a * b", "empty `` ticks", "a **** b"):
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, text_type_text)])
+        self.assertEqual(markdown_to_html_node("2 ** 3 = 8").to_html(),
+                         "<div><p>2 ** 3 = 8</p></div>")
+
+    def test_plain_text(self):
+        nodes = text_to_textnodes("just text")
+        self.assertEqual(nodes, [TextNode("just text", text_type_text)])
+
 
 class TestMarkdownToBlocks(unittest.TestCase):
     def test_markdown_to_blocks(self):
@@ -190,6 +230,32 @@ class TestMarkdownToBlocks(unittest.TestCase):
         self.assertEqual(blocks, expected_blocks)
 
 
+class TestScanBlocks(unittest.TestCase):
+    def test_typed_blocks(self):
+        markdown = "# Title\nSome text\nmore text\n\n* a\n* b {$class=list}"
+        blocks = list(scan_blocks(markdown))
+        expected_blocks = [
+            Block(block_type_heading, ["# Title"]),
+            Block(block_type_paragraph, ["Some text", "more text"]),
+            Block(block_type_unordered_list, [
+                  "* a", "* b"], {"class": "list"}),
+        ]
+        self.assertEqual(blocks, expected_blocks)
+
+    def test_code_block_keeps_blank_lines(self):
+        markdown = "```\na\n\nb {$class=x}\n```\nafter"
+        blocks = list(scan_blocks(markdown))
+        expected_blocks = [
+            Block(block_type_code, ["```", "a", "", "b {$class=x}", "```"]),
+            Block(block_type_paragraph, ["after"]),
+        ]
+        self.assertEqual(blocks, expected_blocks)
+
+    def test_is_lazy(self):
+        blocks = scan_blocks("first\n\nsecond")
+        self.assertEqual(next(blocks), Block(block_type_paragraph, ["first"]))
+
+
 def compare_nodes(node1, node2):
     if type(node1) != type(node2):
         return False, f"Type mismatch: {type(node1)} != {type(node2)}"
@@ -260,8 +326,8 @@ class TestMarkdownToHtmlNode(unittest.TestCase):
                 LeafNode(None, ", "),
                 LeafNode("a", "link", {"href": "http://example.com"}),
                 LeafNode(None, ", and "),
-                LeafNode(
-                    "img", "", {"src": "http://example.com/image.png", "alt": "image"})
+                LeafNode("img", "", {"src": "http://example.com/image.png", "alt": "image",
+                                     "loading": "lazy", "decoding": "async"})
             ]),
         ])
         self.assertEqual(node, expected_node)
@@ -310,6 +376,28 @@ class TestMarkdownToHtmlNode(unittest.TestCase):
 
         self.assertEqual(node, expected_node)
 
+    def test_code_block_is_escaped(self):
+        node = markdown_to_html_node("```\nif a < b && c:\n```")
+        self.assertEqual(node.to_html(), "<div><pre><code>if a &lt; b &amp;&amp; c:\n</code></pre></div>")
+
+    def test_inline_text_is_escaped_once_when_built(self):
+        node = markdown_to_html_node('a < b & *c > d* [x "y"](/q?a=1&b=2) ![<i>](/a&b.png)')
+        self.assertTrue(all(type(leaf) is EscapedLeafNode for leaf in node.children[0].children))
+        self.assertEqual(node.to_html(),
+                         '<div><p>a &lt; b &amp; <i>c &gt; d</i> <a href="/q?a=1&amp;b=2">x "y"</a> '
+                         '<img src="/a&amp;b.png" alt="&lt;i&gt;" loading="lazy" decoding="async"></p></div>')
+
+    def test_unknown_language(self):
+        node = markdown_to_html_node("```nosuchlanguage\n<b>\n```")
+        self.assertEqual(node.to_html(), '<div><pre><code class="highlight language-nosuchlanguage">'
+                                         "&lt;b&gt;\n</code></pre></div>")
+
+    @unittest.skipIf(highlight_version == "", "Pygments is not installed")
+    def test_highlighted_language(self):
+        html = markdown_to_html_node("```Python\nx = 1 < 2\n```").to_html()
+        self.assertTrue(html.startswith('<div><pre><code class="highlight language-python"><span class="n">x</span>'))
+        self.assertIn('<span class="o">&lt;</span>', html)
+
 
 class TestMarkdownToHTMLClassNames(unittest.TestCase):
 
@@ -393,5 +481,27 @@ class TestMarkdownToHTMLClassNames(unittest.TestCase):
         self.assertEqual(li2.children[0].value, "Item 2")
 
 
+class TestInlineMemo(unittest.TestCase):
+    def test_children_match_unmemoized_render(self):
+        text = "Go to the [**next**](/next/) page with `code`"
+        expected = [text_node_to_html_node(node)
+                    for node in text_to_textnodes(text)]
+        self.assertEqual(text_to_children(text), expected)
+        self.assertEqual(text_to_children(text), expected)
+
+    def test_repeated_strings_hit_the_memo(self):
+        drain_inline_stats()
+        markdown = "* Next\n* Previous\n\n* Next\n* Previous"
+        markdown_to_html_node(markdown)
+        stats = drain_inline_stats()
+        self.assertGreaterEqual(stats["hits"], 2)
+        self.assertEqual(stats["hits"] + stats["misses"], 4)
+
+    def test_each_call_returns_a_fresh_list(self):
+        first = text_to_children("Next")
+        first.append(LeafNode(None, "extra"))
+        self.assertEqual(len(text_to_children("Next")), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
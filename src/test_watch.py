@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from watch import DependencyGraph, PollingWatcher, link_target, wait_for_changes
+
+
+class TestLinkTarget(unittest.TestCase):
+    def test_absolute_directory(self):
+        self.assertEqual(link_target("/kafka", "content/index.md", "content"),
+                         os.path.join("content", "kafka", "index.md"))
+
+    def test_relative_html(self):
+        self.assertEqual(link_target("../b.html#top", "content/a/x.md", "content"),
+                         os.path.join("content", "b.md"))
+
+    def test_external_and_assets(self):
+        self.assertIsNone(link_target(
+            "https://example.com", "content/index.md", "content"))
+        self.assertIsNone(link_target(
+            "/images/kafka.png", "content/index.md", "content"))
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_reverse_edges(self):
+        graph = DependencyGraph()
+        graph.update_page("a.md", {"base.html"}, {"b.md"})
+        graph.update_page("c.md", {"base.html", "post.html"}, set())
+        self.assertEqual(graph.pages_using_template("base.html"), {"a.md", "c.md"})
+        self.assertEqual(graph.pages_linking_to("b.md"), {"a.md"})
+
+        graph.update_page("a.md", {"post.html"}, set())
+        self.assertEqual(graph.pages_using_template("base.html"), {"c.md"})
+        self.assertEqual(graph.pages_linking_to("b.md"), set())
+
+        graph.remove_page("c.md")
+        self.assertEqual(graph.pages_using_template("post.html"), {"a.md"})
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def test_detects_changes(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "page.md")
+            with open(path, "w") as file:
+                file.write("# One")
+            watcher = PollingWatcher([root], interval=0.01)
+            self.assertEqual(watcher.read(0.02), set())
+            os.utime(path, ns=(1, 1))
+            changed, _ = wait_for_changes(watcher, debounce=0.02)
+            self.assertEqual(changed, {path})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,9 @@
-import itertools
-from htmlnode import LeafNode, ParentNode, HTMLNode
+from htmlnode import EscapedLeafNode, LeafNode, ParentNode, HTMLNode, escape_attribute, escape_text
+from fragcache import fragment_key
+from highlight import fence_language, highlight, version as highlight_version
 
+import collections
+import functools
 import re
 
 text_type_text = "text"
@@ -12,6 +15,8 @@ text_type_image = "image"
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -66,7 +71,7 @@ def split_nodes_image(old_nodes):
                 start = 0
                 for image in images:
                     image_markdown = f"![{image[0]}]({image[1]})"
-                    image_start = original_text.find(image_markdown)
+                    image_start = original_text.find(image_markdown, start)
                     image_end = image_start + len(image_markdown)
 
                     text_before = original_text[start:image_start]
@@ -96,7 +101,7 @@ def split_nodes_link(old_nodes):
                 start = 0
                 for link in links:
                     link_markdown = f"[{link[0]}]({link[1]})"
-                    link_start = original_text.find(link_markdown)
+                    link_start = original_text.find(link_markdown, start)
                     link_end = link_start + len(link_markdown)
 
                     text_before = original_text[start:link_start]
@@ -111,16 +116,113 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+# Alternatives are tried in the same order the old split_nodes_* chain ran:
+# bold before italic, images before links so "![alt](url)" is not read as
+# "!" followed by a link. Bold, italic and code need some content, so an
+# unmatched "**" or "``" stays text instead of becoming an empty element.
+inline_pattern = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|\*(?P<italic>[^*]+)\*"
+    r"|`(?P<code>[^`]+)`"
+    r"|!\[(?P<image>.*?)\]\((?P<image_url>.*?)\)"
+    r"|\[(?P<link>.*?)\]\((?P<link_url>.*?)\)",
+    re.DOTALL,
+)
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, text_type_text)]
-    nodes = split_nodes_delimiter(nodes, "**", text_type_bold)
-    nodes = split_nodes_delimiter(nodes, "*", text_type_italic)
-    nodes = split_nodes_delimiter(nodes, "`", text_type_code)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """ tokenize inline markdown in a single left-to-right scan """
+    nodes = []
+    start = 0
+    for match in inline_pattern.finditer(text):
+        if match.start() > start:
+            nodes.append(TextNode(text[start:match.start()], text_type_text))
+        kind = match.lastgroup
+        if kind == "bold":
+            nodes.append(TextNode(match.group("bold"), text_type_bold))
+        elif kind == "italic":
+            nodes.append(TextNode(match.group("italic"), text_type_italic))
+        elif kind == "code":
+            nodes.append(TextNode(match.group("code"), text_type_code))
+        elif kind == "image_url":
+            nodes.append(TextNode(match.group("image"),
+                         text_type_image, match.group("image_url")))
+        else:
+            nodes.append(TextNode(match.group("link"),
+                         text_type_link, match.group("link_url")))
+        start = match.end()
+    if start < len(text) or not nodes:
+        nodes.append(TextNode(text[start:], text_type_text))
     return nodes
 
 
+asset_urls = {}
+image_variants = {}
+_asset_digest = ""
+
+
+def set_asset_urls(urls, digest, images=None):
+    """Rewrite link and image URLs found in `urls` to their fingerprinted form.
+
+    `images` maps an image URL to (width, height, srcset) of its resized
+    variants. `digest` identifies both mappings; it is part of the
+    fragment cache key of every block with a link or image, and memoized
+    inline nodes are dropped since they hold rewritten URLs.
+    """
+    global asset_urls, image_variants, _asset_digest
+    if digest == _asset_digest:
+        return
+    asset_urls = urls
+    image_variants = images or {}
+    _asset_digest = digest
+    info = _memoized_inline_nodes.cache_info()
+    _inline_merged.update(hits=info.hits - _inline_drained["hits"],
+                          misses=info.misses - _inline_drained["misses"])
+    _inline_drained.clear()
+    _memoized_inline_nodes.cache_clear()
+
+
+inline_memo_size = 4096
+inline_memo_max_length = 256
+
+
+@functools.lru_cache(maxsize=inline_memo_size)
+def _memoized_inline_nodes(text):
+    return tuple(text_node_to_html_node(node) for node in text_to_textnodes(text))
+
+
+def text_to_children(text):
+    """Inline-render text into a list of leaf nodes.
+
+    Short strings (headings, list items, link texts) repeat across a site,
+    so their nodes are memoized and shared between trees; nothing may
+    modify a node returned from here in place.
+    """
+    if len(text) <= inline_memo_max_length:
+        return list(_memoized_inline_nodes(text))
+    return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+
+
+_inline_drained = collections.Counter()
+_inline_merged = collections.Counter()
+
+
+def merge_inline_stats(stats):
+    """ add hit/miss counts drained in another process """
+    _inline_merged.update(stats)
+
+
+def drain_inline_stats():
+    """ inline memo hits and misses since the last drain, plus merged ones """
+    info = _memoized_inline_nodes.cache_info()
+    stats = collections.Counter(hits=info.hits - _inline_drained["hits"],
+                                misses=info.misses - _inline_drained["misses"])
+    _inline_drained.update(stats)
+    stats.update(_inline_merged)
+    _inline_merged.clear()
+    return stats
+
+
 block_type_heading = "heading"
 block_type_code = "code"
 block_type_quote = "quote"
@@ -128,116 +230,219 @@ block_type_unordered_list = "unordered_list"
 block_type_ordered_list = "ordered_list"
 block_type_paragraph = "paragraph"
 
+# shared tag strings, so millions of heading nodes don't each carry a fresh f-string
+heading_tags = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+class Block:
+    __slots__ = ("block_type", "lines", "props")
+
+    def __init__(self, block_type, lines, props=None):
+        self.block_type = block_type
+        self.lines = lines
+        self.props = props if props is not None else {}
 
-def markdown_to_html_node(markdown):
-    blocks = markdown_to_blocks(markdown)
+    def __eq__(self, other):
+        if isinstance(other, Block):
+            return (self.block_type == other.block_type) and (self.lines == other.lines) and (self.props == other.props)
+        return False
+
+    def __repr__(self):
+        return f"Block({self.block_type}, {self.lines}, {self.props})"
+
+
+ordered_list_pattern = re.compile(r"\d+\.")
+class_pattern = re.compile(r"\{\$class=([^\}]+)\}")
+
+
+def markdown_to_html_node(markdown, cache=None):
+    if cache is None:
+        html_blocks = []
+        for block in scan_blocks(markdown):
+            html_block = block_to_html_node(
+                block.lines, block.block_type, block.props)
+            html_blocks.append(html_block)
+        return ParentNode("div", html_blocks)
+
+    blocks = list(scan_blocks(markdown))
+    keys = [block_key(block) for block in blocks]
+    fragments = cache.get_many(keys)
     html_blocks = []
-    for block in blocks:
-        block_type = detect_block_type(block)
-        html_block = block_to_html_node(block, block_type)
-        html_blocks.append(html_block)
+    for block, key in zip(blocks, keys):
+        html = fragments.get(key)
+        if html is None:
+            html = block_to_html_node(
+                block.lines, block.block_type, block.props).to_html()
+            cache.put(key, html)
+            fragments[key] = html
+        html_blocks.append(EscapedLeafNode(None, html))
     return ParentNode("div", html_blocks)
 
 
+def block_key(block):
+    """Fragment cache key: the block's type, class and text.
+
+    Blocks with links or images add the asset map's digest, code blocks
+    the highlighter's version.
+    """
+    if block.block_type == block_type_code:
+        context = highlight_version
+    else:
+        context = _asset_digest if any("](" in line for line in block.lines) else ""
+    return fragment_key(block.block_type, block.props.get("class", ""), context, *block.lines)
+
+
 def markdown_to_blocks(markdown):
-    lines = markdown.split("\n")
-    blocks = []
-    current_block = []
-    for line in lines:
-        if line.strip() == "":
-            if current_block:
-                blocks.append(current_block)
-                current_block = []
+    return [block.lines for block in scan_blocks(markdown)]
+
+
+def scan_blocks(markdown):
+    """Yield typed Blocks, reading every line exactly once.
+
+    The type is decided from a block's first line and `{$class=...}` markers
+    are stripped as lines are appended. Headings are always one line; fenced
+    code runs until its closing fence, blank lines included.
+    """
+    block = None
+    for line in markdown.split("\n"):
+        if block is not None and block.block_type == block_type_code:
+            if line.startswith("```"):
+                block.lines.append(split_class_prop(line, block.props))
+                yield block
+                block = None
+            else:
+                block.lines.append(line)
+        elif not line or line.isspace():
+            if block is not None:
+                yield block
+                block = None
+        elif block is not None:
+            block.lines.append(split_class_prop(line, block.props))
         else:
-            current_block.append(line)
-
-            if detect_block_type(current_block) == block_type_heading:
-                blocks.append(current_block)
-                current_block = []
-    if current_block:
-        blocks.append(current_block)
-    return blocks
+            block = Block(line_block_type(line), [])
+            block.lines.append(split_class_prop(line, block.props))
+            if block.block_type == block_type_heading:
+                yield block
+                block = None
+    if block is not None:
+        yield block
 
 
-def detect_block_type(block):
-    first_line = block[0]
-    if first_line.startswith("#"):
+def line_block_type(line):
+    if line.startswith("#"):
         return block_type_heading
-    elif first_line.startswith("```"):
+    elif line.startswith("```"):
         return block_type_code
-    elif first_line.startswith(">"):
+    elif line.startswith(">"):
         return block_type_quote
-    elif first_line.startswith("* "):
+    elif line.startswith("* "):
         return block_type_unordered_list
-    elif re.match(r"^\d+\.", first_line):
+    elif ordered_list_pattern.match(line):
         return block_type_ordered_list
     else:
         return block_type_paragraph
 
 
+def detect_block_type(block):
+    return line_block_type(block[0])
+
+
+def split_class_prop(line, props):
+    """ strip a {$class=...} marker from the line, storing it in props """
+    if "{$class=" not in line:
+        return line
+    match = class_pattern.search(line)
+    if match is None:
+        return line
+    props["class"] = match.group(1)
+    return class_pattern.sub("", line).strip()
+
+
 def extract_class_props(block):
     """Extract class properties from a markdown block and return the cleaned block and class props."""
     class_props = {}
-    class_pattern = r"\{\$class=([^\}]+)\}"
-    cleaned_block = []
-    for line in block:
-        match = re.search(class_pattern, line)
-        if match:
-            class_props["class"] = match.group(1)
-            cleaned_line = re.sub(class_pattern, "", line).strip()
-            cleaned_block.append(cleaned_line)
-        else:
-            cleaned_block.append(line)
+    cleaned_block = [split_class_prop(line, class_props) for line in block]
     return cleaned_block, class_props
 
 
-def block_to_html_node(block, block_type):
-    block, class_props = extract_class_props(block)
+def block_to_html_node(block, block_type, class_props=None):
+    if class_props is None:
+        block, class_props = extract_class_props(block)
+    class_props = class_props or None
 
     if block_type == block_type_heading:
         stripped = block[0].lstrip()
-        heading_level = len(
-            list(next((group for group in itertools.groupby(stripped)), ('#', 0))[1]))
-        heading_level = min(heading_level, 6)
-        content = stripped.lstrip("#").strip()
-        return ParentNode(f"h{heading_level}", [text_node_to_html_node(node) for node in text_to_textnodes(content)], class_props)
+        content = stripped.lstrip("#")
+        heading_level = min(len(stripped) - len(content), 6)
+        content = content.strip()
+        return ParentNode(heading_tags[heading_level - 1], text_to_children(content), class_props)
 
     elif block_type == block_type_code:
-        code_lines = block[1:-1]
+        code_lines = block[1:-1] if block[-1].startswith("```") else block[1:]
         code_text = "\n".join(code_lines) + "\n"
-        return ParentNode("pre", [LeafNode("code", code_text)], class_props)
+        language = fence_language(block[0])
+        code_props = {"class": f"highlight language-{language}"} if language else None
+        return ParentNode("pre", [LeafNode("code", highlight(code_text, language), code_props)], class_props)
 
     elif block_type == block_type_quote:
         quote_content = " ".join([line.lstrip("> ").strip() for line in block])
-        return ParentNode("blockquote", [text_node_to_html_node(node) for node in text_to_textnodes(quote_content)], class_props)
+        return ParentNode("blockquote", text_to_children(quote_content), class_props)
 
     elif block_type == block_type_unordered_list:
         list_items = [line.lstrip("* ").strip() for line in block]
-        return ParentNode("ul", [ParentNode("li", [text_node_to_html_node(node) for node in text_to_textnodes(item)]) for item in list_items], class_props)
+        return ParentNode("ul", [ParentNode("li", text_to_children(item)) for item in list_items], class_props)
 
     elif block_type == block_type_ordered_list:
         list_items = [line.lstrip("0123456789. ").strip() for line in block]
-        return ParentNode("ol", [ParentNode("li", [text_node_to_html_node(node) for node in text_to_textnodes(item)]) for item in list_items], class_props)
+        return ParentNode("ol", [ParentNode("li", text_to_children(item)) for item in list_items], class_props)
 
     elif block_type == block_type_paragraph:
         paragraph_text = " ".join(block)
-        return ParentNode("p", [text_node_to_html_node(node) for node in text_to_textnodes(paragraph_text)], class_props)
+        return ParentNode("p", text_to_children(paragraph_text), class_props)
 
     else:
         raise ValueError(f"Invalid block type: {block_type}")
 
 
 def text_node_to_html_node(text_node):
+    """Build the leaf for one inline node.
+
+    Text and attribute values are escaped here, once, into an
+    EscapedLeafNode that the serializer writes without checking them
+    again; inline nodes of short strings are memoized, so most of them
+    are never escaped twice.
+    """
+    text = escape_text(text_node.text)
     if text_node.text_type == text_type_text:
-        return LeafNode(None, text_node.text)
+        return EscapedLeafNode(None, text)
     if text_node.text_type == text_type_bold:
-        return LeafNode("b", text_node.text)
+        return EscapedLeafNode("b", text)
     if text_node.text_type == text_type_italic:
-        return LeafNode("i", text_node.text)
+        return EscapedLeafNode("i", text)
     if text_node.text_type == text_type_code:
-        return LeafNode("code", text_node.text)
+        return EscapedLeafNode("code", text)
     if text_node.text_type == text_type_link:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        return EscapedLeafNode("a", text, {"href": escape_attribute(asset_urls.get(text_node.url, text_node.url))})
     if text_node.text_type == text_type_image:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        return image_node(text_node.url, text_node.text)
     raise ValueError(f"Invalid text type: {text_node.text_type}")
+
+
+def image_node(url, alt):
+    """A lazily loaded <img>, wrapped in a <picture> offering WebP variants when there are any.
+
+    Known dimensions are set on the <img> so the page does not shift as
+    images arrive. Like text_node_to_html_node, it escapes every value.
+    """
+    props = {"src": escape_attribute(asset_urls.get(url, url)), "alt": escape_attribute(alt)}
+    attributes = image_variants.get(url)
+    if attributes is not None:
+        props["width"], props["height"] = str(attributes[0]), str(attributes[1])
+    props["loading"] = "lazy"
+    props["decoding"] = "async"
+    img = EscapedLeafNode("img", "", props)
+    if attributes is None or not attributes[2]:
+        return img
+    source = EscapedLeafNode("source", "", {"type": "image/webp", "srcset": escape_attribute(attributes[2]),
+                                            "sizes": f"(max-width: {attributes[0]}px) 100vw, {attributes[0]}px"})
+    return ParentNode("picture", [source, img])
@@ -0,0 +1,201 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from frontmatter import split_front_matter
+from textnode import extract_markdown_links
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+watch_mask = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+event_header = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Recursive directory watcher on top of Linux inotify, via ctypes."""
+
+    def __init__(self, roots):
+        self.roots = roots
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.directories = {}
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, path):
+        for dir_path, _, _ in os.walk(path):
+            wd = self.libc.inotify_add_watch(
+                self.fd, os.fsencode(dir_path), watch_mask)
+            if wd >= 0:
+                self.directories[wd] = dir_path
+
+    def read(self, timeout=None):
+        """ return the set of paths that changed, or an empty set after timeout seconds """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = event_header.unpack_from(data, offset)
+            offset += event_header.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                changed.update(self.roots)
+                continue
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            changed.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self.add_tree(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback that diffs (mtime, size) snapshots of the trees."""
+
+    def __init__(self, roots, interval=0.5):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for root in self.roots:
+            for dir_path, _, file_names in os.walk(root):
+                for name in file_names:
+                    path = os.path.join(dir_path, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self.interval if deadline is None else min(
+                self.interval, deadline - time.monotonic())
+            if remaining > 0:
+                time.sleep(remaining)
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(roots, polling=False):
+    roots = [root for root in roots if os.path.isdir(root)]
+    if not polling:
+        try:
+            return InotifyWatcher(roots)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(roots)
+
+
+def wait_for_changes(watcher, debounce=0.1):
+    """Block until something changes, then keep collecting until the tree
+    has been quiet for `debounce` seconds. Returns (paths, first event time)."""
+    changed = set()
+    while not changed:
+        changed = watcher.read()
+    detected = time.monotonic()
+    while True:
+        more = watcher.read(debounce)
+        if not more:
+            return changed, detected
+        changed |= more
+
+
+def link_target(url, source_path, content_dir):
+    """ map an internal link to the markdown source it points at, or None """
+    if "://" in url or url.startswith(("//", "#", "mailto:")):
+        return None
+    path = url.split("#", 1)[0].split("?", 1)[0]
+    if not path:
+        return None
+    if path.startswith("/"):
+        target = os.path.join(content_dir, path.lstrip("/"))
+    else:
+        target = os.path.join(os.path.dirname(source_path), path)
+    target = os.path.normpath(target)
+    root, ext = os.path.splitext(target)
+    if ext == ".html":
+        return root + ".md"
+    if ext == "":
+        return os.path.join(target, "index.md")
+    return None
+
+
+def page_dependencies(source_path, default_template, loader, content_dir):
+    """ return (template files, linked page sources) for one page """
+    with open(source_path, "r") as file:
+        metadata, markdown = split_front_matter(file.read())
+    template = loader.load(metadata.get("template", default_template))
+    templates = {path for path, _ in template.dependencies}
+    links = set()
+    for _, url in extract_markdown_links(markdown):
+        target = link_target(url, source_path, content_dir)
+        if target is not None:
+            links.add(target)
+    return templates, links
+
+
+class DependencyGraph:
+    """In-memory page -> template and page -> linked page edges, with
+    reverse indexes so a changed file maps to its dependents in O(1)."""
+
+    def __init__(self):
+        self.templates = {}
+        self.links = {}
+        self.template_users = {}
+        self.linked_from = {}
+
+    def update_page(self, page, templates, links):
+        self.remove_page(page)
+        self.templates[page] = templates
+        self.links[page] = links
+        for template in templates:
+            self.template_users.setdefault(template, set()).add(page)
+        for target in links:
+            self.linked_from.setdefault(target, set()).add(page)
+
+    def remove_page(self, page):
+        for template in self.templates.pop(page, ()):
+            self.template_users.get(template, set()).discard(page)
+        for target in self.links.pop(page, ()):
+            self.linked_from.get(target, set()).discard(page)
+
+    def pages_using_template(self, template):
+        return set(self.template_users.get(template, ()))
+
+    def pages_linking_to(self, page):
+        return set(self.linked_from.get(page, ()))